@@ -0,0 +1,91 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+from elimination import eliminate_in_place, rref_solution
+
+
+def solve_augmented_matrices(matrices, eps=1e-10):
+    '''solve a list of augmented matrices, stacking same-shape square systems into one vectorized solve
+
+    return one (basepoint, direction_vectors) pair, or None for no solutions,
+    per matrix in input order
+    '''
+    results = [None] * len(matrices)
+    groups = dict()
+    for i, matrix in enumerate(matrices):
+        groups.setdefault(matrix.shape, []).append(i)
+
+    for (num_rows, num_columns), indices in groups.items():
+        num_variables = num_columns - 1
+        stack = np.stack([matrices[i] for i in indices])
+        remaining = indices
+        if num_rows == num_variables:
+            coefficients = stack[:, :, :-1]
+            full_rank = np.linalg.matrix_rank(coefficients) == num_variables
+            if np.any(full_rank):
+                solutions = np.linalg.solve(coefficients[full_rank], stack[full_rank, :, -1:])[:, :, 0]
+                empty = np.zeros((0, num_variables))
+                for i, x in zip(np.asarray(indices)[full_rank], solutions):
+                    results[i] = (x, empty)
+            remaining = np.asarray(indices)[~full_rank].tolist()
+        for i in remaining:
+            rref = matrices[i].copy()
+            pivots = eliminate_in_place(rref, reduced=True, eps=eps)
+            results[i] = rref_solution(rref, pivots)
+    return results
+
+
+def _chunks(systems, chunk_size):
+    systems = iter(systems)
+    while True:
+        chunk = list(islice(systems, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _wrap(system, solution):
+    if solution is None:
+        return system.NO_SOLUTIONS_MSG
+    return system.solution_from_arrays(*solution)
+
+
+def solve_many(systems, workers=None, chunk_size=1000, eps=1e-10, max_pending=None):
+    '''solve many independent linear systems on a process pool, yielding the results in input order
+
+    systems is any iterable of LinearSystem. each chunk of chunk_size systems
+    is sent to the workers as plain float64 augmented matrices, and at most
+    max_pending chunks (default 2 per worker) are in flight at once, so memory
+    stays flat however many systems are solved. with workers=0 everything
+    runs in the calling process. every result has the same form as
+    GaussianEliminationSolution(method='pivoting')
+    '''
+    chunks = _chunks(systems, chunk_size)
+    if workers == 0:
+        for chunk in chunks:
+            solutions = solve_augmented_matrices([s.augmented_matrix(copy=False) for s in chunk], eps=eps)
+            for system, solution in zip(chunk, solutions):
+                yield _wrap(system, solution)
+        return
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if max_pending is None:
+        max_pending = 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, pool.submit(
+                solve_augmented_matrices, [s.augmented_matrix(copy=False) for s in chunk], eps)))
+            while len(pending) >= max_pending:
+                chunk, future = pending.popleft()
+                for system, solution in zip(chunk, future.result()):
+                    yield _wrap(system, solution)
+        while pending:
+            chunk, future = pending.popleft()
+            for system, solution in zip(chunk, future.result()):
+                yield _wrap(system, solution)
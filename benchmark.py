@@ -0,0 +1,316 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+import timeit
+
+import numpy as np
+
+from vector import Vector, DECIMAL_BACKEND, FLOAT64_BACKEND
+from line import Line
+from hyperplane import Hyperplane
+from linsys import LinearSystem
+from elimination import lu_factor, blocked_lu_factor
+
+DIMENSIONS = [2, 10, 100, 1000, 10000]
+VECTOR_OPERATIONS = {
+    'add': lambda a, b: a + b,
+    'sub': lambda a, b: a - b,
+    'mul': lambda a, b: a * 1.5,
+    'dot_product': lambda a, b: a.dot_product(b),
+    'angle': lambda a, b: a.angle(b),
+    'projection_on': lambda a, b: a.projection_on(b),
+}
+
+SUITE_VECTOR_OPERATIONS = dict(VECTOR_OPERATIONS, **{
+    'magnitude': lambda a, b: a.magnitude(),
+    'unit_vector': lambda a, b: a / a.magnitude(),
+    'orthogonal_on': lambda a, b: a.orthogonal_on(b),
+    'is_parallel_to': lambda a, b: a.is_parallel_to(b),
+    'eq': lambda a, b: a == b,
+})
+SUITE_DIMENSIONS = [2, 10, 100, 1000]
+SUITE_SYSTEM_SIZES = {
+    LinearSystem.DECIMAL_METHOD: [3, 10, 30],
+    LinearSystem.EXACT_METHOD: [3, 10, 30],
+    LinearSystem.PIVOTING_METHOD: [3, 10, 100, 500],
+    LinearSystem.SPARSE_METHOD: [3, 10, 100],
+    LinearSystem.BLOCKED_METHOD: [3, 10, 100, 500],
+}
+QUICK_DIMENSIONS = [2, 100]
+QUICK_SYSTEM_SIZES = {method: sizes[:2] for method, sizes in SUITE_SYSTEM_SIZES.items()}
+
+# the polynomial-fit systems of linsys.py: row i holds the powers x_i^degree .. x_i of x_i = i * step
+POLYNOMIAL_FIT_STEP = 0.000638162093171666
+POLYNOMIAL_FIT_VALUES = [53.2951176, 54.00222438, 54.70933116, 55.41643794, 56.12354473, 56.83065151]
+POLYNOMIAL_FIT_DEGREES = [3, 4, 5]
+
+
+def random_coordinates(dimension, seed=0):
+    '''generate reproducible random coordinates'''
+    rng = random.Random(seed)
+    return [rng.uniform(-10, 10) for _ in range(dimension)]
+
+
+def time_call(func, number=None, repeat=3):
+    '''return the best time per call of func in seconds'''
+    timer = timeit.Timer(func)
+    if number is None:
+        number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def bench_vector_backends(dimensions=DIMENSIONS, operations=VECTOR_OPERATIONS):
+    '''compare the decimal and float64 vector backends across dimensions'''
+    results = []
+    for dimension in dimensions:
+        coords_a = random_coordinates(dimension, seed=1)
+        coords_b = random_coordinates(dimension, seed=2)
+        for name, operation in operations.items():
+            row = {'operation': name, 'dimension': dimension}
+            for backend in (DECIMAL_BACKEND, FLOAT64_BACKEND):
+                a = Vector(coords_a, backend=backend)
+                b = Vector(coords_b, backend=backend)
+                row[backend] = time_call(lambda: operation(a, b))
+            row['speedup'] = row[DECIMAL_BACKEND] / row[FLOAT64_BACKEND]
+            results.append(row)
+    return results
+
+
+def bench_blocked_scaling(size=1000, workers=None, block_size=64):
+    '''time the blocked LU factorization from 1 to N worker threads against the unblocked one'''
+    if workers is None:
+        workers = sorted(set([1, 2, 4, 8, 16, 32, 64, os.cpu_count() or 1]))
+        workers = [w for w in workers if w <= (os.cpu_count() or 1)]
+    matrix = np.random.default_rng(0).random((size, size))
+    unblocked = time_call(lambda: lu_factor(matrix), number=1)
+    reference = blocked_lu_factor(matrix, block_size=block_size, workers=1)
+    results = []
+    for w in workers:
+        seconds = time_call(lambda: blocked_lu_factor(matrix, block_size=block_size, workers=w), number=1)
+        identical = all(np.array_equal(x, y) for x, y in zip(
+            reference[:3], blocked_lu_factor(matrix, block_size=block_size, workers=w)[:3]))
+        results.append({'workers': w, 'size': size, 'seconds': seconds,
+                        'speedup': unblocked / seconds, 'identical': identical})
+    return results
+
+
+def polynomial_fit_system(degree, backend=DECIMAL_BACKEND):
+    '''build the ill-conditioned polynomial-fit system of the given degree used in linsys.py'''
+    planes = []
+    for i, value in enumerate(POLYNOMIAL_FIT_VALUES[:degree + 1]):
+        x = (i + 1) * POLYNOMIAL_FIT_STEP
+        planes.append(Hyperplane(normal_vector=Vector([x ** k for k in range(degree, 0, -1)], backend=backend),
+                                 constant_term=value - 1))
+    return LinearSystem(planes)
+
+
+def random_system(size, seed=0):
+    '''build a reproducible random square system with decimal hyperplanes'''
+    matrix = np.random.default_rng(seed).uniform(-10, 10, (size, size + 1))
+    return LinearSystem([Hyperplane(normal_vector=Vector(row[:-1].tolist()), constant_term=row[-1])
+                         for row in matrix])
+
+
+def quiet(func):
+    '''wrap func so what it prints does not end up in the benchmark output'''
+    def wrapper():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func()
+    return wrapper
+
+
+def _record(group, name, params, func, number, repeat):
+    return {'group': group, 'name': name, 'params': params,
+            'seconds': time_call(func, number=number, repeat=repeat)}
+
+
+def bench_vectors(dimensions, number=None, repeat=3):
+    '''time every Vector operation in both backends'''
+    results = []
+    for dimension in dimensions:
+        coords_a = random_coordinates(dimension, seed=1)
+        coords_b = random_coordinates(dimension, seed=2)
+        for backend in (DECIMAL_BACKEND, FLOAT64_BACKEND):
+            a = Vector(coords_a, backend=backend)
+            b = Vector(coords_b, backend=backend)
+            for name, operation in SUITE_VECTOR_OPERATIONS.items():
+                results.append(_record('vector', name, {'dimension': dimension, 'backend': backend},
+                                       lambda: operation(a, b), number, repeat))
+    for backend in (DECIMAL_BACKEND, FLOAT64_BACKEND):
+        a = Vector(random_coordinates(3, seed=1), backend=backend)
+        b = Vector(random_coordinates(3, seed=2), backend=backend)
+        results.append(_record('vector', 'cross_product', {'dimension': 3, 'backend': backend},
+                               lambda: a.cross_product(b), number, repeat))
+    return results
+
+
+def bench_geometry(dimensions, number=None, repeat=3):
+    '''time Line.intersection_with and Hyperplane construction and __eq__'''
+    results = []
+    l1 = Line(normal_vector=Vector(random_coordinates(2, seed=1)), constant_term=3)
+    l2 = Line(normal_vector=Vector(random_coordinates(2, seed=2)), constant_term=-1)
+    results.append(_record('geometry', 'line_intersection_with', {}, lambda: l1.intersection_with(l2), number, repeat))
+    for dimension in dimensions:
+        normal_vector = Vector(random_coordinates(dimension, seed=1))
+        params = {'dimension': dimension}
+        results.append(_record('geometry', 'hyperplane_construct', params,
+                               lambda: Hyperplane(normal_vector=normal_vector, constant_term=1), number, repeat))
+        p1 = Hyperplane(normal_vector=normal_vector, constant_term=1)
+        p2 = Hyperplane(normal_vector=normal_vector * 2, constant_term=2)
+        results.append(_record('geometry', 'hyperplane_eq', params, lambda: p1 == p2, number, repeat))
+    return results
+
+
+def bench_linear_systems(system_sizes, number=None, repeat=3):
+    '''time compute_triangular_form, compute_rref and every GaussianEliminationSolution method'''
+    results = []
+    for size in system_sizes[LinearSystem.DECIMAL_METHOD]:
+        system = random_system(size)
+        results.append(_record('linsys', 'compute_triangular_form', {'size': size},
+                               system.compute_triangular_form, number, repeat))
+        results.append(_record('linsys', 'compute_rref', {'size': size}, system.compute_rref, number, repeat))
+    for method, sizes in system_sizes.items():
+        for size in sizes:
+            system = random_system(size)
+            results.append(_record('linsys', 'GaussianEliminationSolution', {'size': size, 'method': method},
+                                   quiet(lambda: system.GaussianEliminationSolution(method=method)), number, repeat))
+    for degree in POLYNOMIAL_FIT_DEGREES:
+        system = polynomial_fit_system(degree)
+        for method in (LinearSystem.DECIMAL_METHOD, LinearSystem.PIVOTING_METHOD, LinearSystem.EXACT_METHOD):
+            results.append(_record('polyfit', 'GaussianEliminationSolution', {'degree': degree, 'method': method},
+                                   quiet(lambda: system.GaussianEliminationSolution(method=method)), number, repeat))
+    return results
+
+
+def run_suite(quick=False, groups=None, number=None, repeat=3):
+    '''run the benchmark suite and return one record per case
+
+    every record holds its group, name, params and best time per call in
+    seconds. quick runs only the smallest sizes once, groups restricts the run to
+    some of 'vector', 'geometry' and 'linsys' (which includes 'polyfit')
+    '''
+    dimensions = QUICK_DIMENSIONS if quick else SUITE_DIMENSIONS
+    if quick:
+        repeat = 1
+    system_sizes = QUICK_SYSTEM_SIZES if quick else SUITE_SYSTEM_SIZES
+    benches = {'vector': lambda: bench_vectors(dimensions, number, repeat),
+               'geometry': lambda: bench_geometry(dimensions, number, repeat),
+               'linsys': lambda: bench_linear_systems(system_sizes, number, repeat)}
+    results = []
+    for group in groups or benches:
+        results.extend(benches[group]())
+    return results
+
+
+def case_key(record):
+    '''identify a case across runs by its group, name and params'''
+    params = ','.join('{}={}'.format(k, v) for k, v in sorted(record['params'].items()))
+    return '{}.{}[{}]'.format(record['group'], record['name'], params)
+
+
+def save_results(path, results):
+    '''save suite results as json, together with the machine and library versions'''
+    with open(path, 'w') as f:
+        json.dump({'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                   'python': platform.python_version(),
+                   'numpy': np.__version__,
+                   'machine': platform.platform(),
+                   'cpus': os.cpu_count(),
+                   'results': results}, f, indent=1)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def compare_results(baseline, current, threshold=0.1):
+    '''match the cases of two runs and flag the ones more than threshold slower or faster
+
+    return one row per case with the baseline and current seconds, their ratio
+    and a status of 'slower', 'faster', 'same', 'new' or 'missing'
+    '''
+    before = dict((case_key(r), r['seconds']) for r in baseline)
+    after = dict((case_key(r), r['seconds']) for r in current)
+    rows = []
+    for key in list(before) + [k for k in after if k not in before]:
+        old, new = before.get(key), after.get(key)
+        if old is None or new is None:
+            rows.append({'case': key, 'baseline': old, 'current': new, 'ratio': None,
+                         'status': 'new' if old is None else 'missing'})
+            continue
+        ratio = new / old
+        status = 'slower' if ratio > 1 + threshold else 'faster' if ratio < 1 / (1 + threshold) else 'same'
+        rows.append({'case': key, 'baseline': old, 'current': new, 'ratio': ratio, 'status': status})
+    return rows
+
+
+def print_suite(results):
+    header = '{:<72}{:>14}'.format('case', 'time (us)')
+    print(header)
+    print('-' * len(header))
+    for row in results:
+        print('{:<72}{:>14.2f}'.format(case_key(row), row['seconds'] * 1e6))
+
+
+def print_comparison(rows):
+    header = '{:<72}{:>14}{:>14}{:>9}{:>9}'.format('case', 'baseline (us)', 'current (us)', 'ratio', 'status')
+    print(header)
+    print('-' * len(header))
+    for row in rows:
+        times = ['{:.2f}'.format(row[k] * 1e6) if row[k] is not None else '-' for k in ('baseline', 'current')]
+        ratio = '{:.2f}x'.format(row['ratio']) if row['ratio'] is not None else '-'
+        print('{:<72}{:>14}{:>14}{:>9}{:>9}'.format(row['case'], times[0], times[1], ratio, row['status']))
+
+
+def print_scaling(results):
+    header = '{:>8}{:>8}{:>12}{:>10}{:>11}'.format('workers', 'size', 'seconds', 'speedup', 'identical')
+    print(header)
+    print('-' * len(header))
+    for row in results:
+        print('{:>8}{:>8}{:>12.3f}{:>9.1f}x{:>11}'.format(
+            row['workers'], row['size'], row['seconds'], row['speedup'], str(row['identical'])))
+
+
+def print_results(results):
+    header = '{:<16}{:>10}{:>16}{:>16}{:>10}'.format(
+        'operation', 'dimension', DECIMAL_BACKEND + ' (us)', FLOAT64_BACKEND + ' (us)', 'speedup')
+    print(header)
+    print('-' * len(header))
+    for row in results:
+        print('{:<16}{:>10}{:>16.2f}{:>16.2f}{:>9.1f}x'.format(
+            row['operation'], row['dimension'], row[DECIMAL_BACKEND] * 1e6,
+            row[FLOAT64_BACKEND] * 1e6, row['speedup']))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='benchmarks of the linear algebra library')
+    commands = parser.add_subparsers(dest='command')
+    suite = commands.add_parser('suite', help='run the benchmark suite')
+    suite.add_argument('--quick', action='store_true', help='only run the smallest sizes')
+    suite.add_argument('--group', action='append', choices=['vector', 'geometry', 'linsys'])
+    suite.add_argument('--save', help='save the results to this json file')
+    compare = commands.add_parser('compare', help='compare two saved suite runs')
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.command == 'suite':
+        results = run_suite(quick=args.quick, groups=args.group)
+        print_suite(results)
+        if args.save:
+            save_results(args.save, results)
+    elif args.command == 'compare':
+        rows = compare_results(load_results(args.baseline), load_results(args.current), args.threshold)
+        print_comparison(rows)
+        sys.exit(1 if any(row['status'] == 'slower' for row in rows) else 0)
+    else:
+        print_results(bench_vector_backends())
+        print_scaling(bench_blocked_scaling())
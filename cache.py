@@ -0,0 +1,159 @@
+import os
+import pickle
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from profiling import count
+
+
+class SolutionCache(object):
+
+    SCHEMA = ('CREATE TABLE IF NOT EXISTS solutions ('
+              'key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)')
+    LAST_USED_INDEX = 'CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used)'
+
+    def __init__(self, path, max_bytes=64 * 2 ** 20, timeout=30.0, touch_interval=1.0):
+        '''content-addressed store of solver results in an sqlite file, shared by every process that opens it
+
+        entries are pickled and looked up by the fingerprint of a system, see
+        LinearSystem.fingerprint. when the stored values outgrow max_bytes the
+        least recently used entries are evicted. a hit writes its last_used
+        when it is older than touch_interval seconds, without waiting for the
+        write lock: when another writer holds it the use is buffered and
+        written with the next hit or put. put and clear lock the database for
+        one short transaction, and readers never block thanks to write-ahead
+        logging. threads and processes can share the file; a connection is
+        opened per call, so the cache survives fork
+        '''
+        self.path = os.fspath(path)
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.touch_interval = touch_interval
+        self.metrics = dict(hits=0, misses=0, stores=0, evictions=0)
+        self.used = dict()
+        with self._connect() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(self.SCHEMA)
+            connection.execute(self.LAST_USED_INDEX)
+
+    @contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so two writers never deadlock upgrading a read lock
+        with self._connect() as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield connection
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+
+    def _count(self, name, n=1):
+        self.metrics[name] += n
+        count('cache_' + name, n)
+
+    def _touch(self, connection):
+        '''write the buffered uses if the write lock is free right now, keep them buffered otherwise'''
+        connection.execute('PRAGMA busy_timeout = 0')
+        try:
+            connection.executemany('UPDATE solutions SET last_used = MAX(last_used, ?) WHERE key = ?',
+                                   [(t, k) for k, t in self.used.items()])
+        except sqlite3.OperationalError:
+            return
+        self.used.clear()
+
+    def get(self, key):
+        '''return the value stored under key and mark it as recently used, None on a miss'''
+        with self._connect() as connection:
+            row = connection.execute('SELECT value, last_used FROM solutions WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self._count('misses')
+                return None
+            now = time.time()
+            if now - row[1] >= self.touch_interval or self.used:
+                self.used[key] = now
+                self._touch(connection)
+        self._count('hits')
+        return pickle.loads(row[0])
+
+    def put(self, key, value):
+        '''store value and the buffered uses, then evict least recently used entries until the cache fits in max_bytes'''
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        used, self.used = self.used, dict()
+        with self._transaction() as connection:
+            connection.executemany('UPDATE solutions SET last_used = MAX(last_used, ?) WHERE key = ?',
+                                   [(t, k) for k, t in used.items()])
+            connection.execute('INSERT OR REPLACE INTO solutions (key, value, size, last_used) VALUES (?, ?, ?, ?)',
+                               (key, sqlite3.Binary(blob), len(blob), time.time()))
+            total = connection.execute('SELECT COALESCE(SUM(size), 0) FROM solutions').fetchone()[0]
+            evicted = 0
+            if total > self.max_bytes:
+                for old_key, size in connection.execute(
+                        'SELECT key, size FROM solutions WHERE key != ? ORDER BY last_used', (key,)).fetchall():
+                    connection.execute('DELETE FROM solutions WHERE key = ?', (old_key,))
+                    evicted += 1
+                    total -= size
+                    if total <= self.max_bytes:
+                        break
+        self._count('stores')
+        if evicted:
+            self._count('evictions', evicted)
+
+    def get_or_compute(self, key, compute):
+        '''return the value stored under key, or compute, store and return it on a miss'''
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def __contains__(self, key):
+        with self._connect() as connection:
+            return connection.execute('SELECT 1 FROM solutions WHERE key = ?', (key,)).fetchone() is not None
+
+    def __len__(self):
+        with self._connect() as connection:
+            return connection.execute('SELECT COUNT(*) FROM solutions').fetchone()[0]
+
+    def size(self):
+        '''return the total bytes of the stored values'''
+        with self._connect() as connection:
+            return connection.execute('SELECT COALESCE(SUM(size), 0) FROM solutions').fetchone()[0]
+
+    def clear(self):
+        self.used.clear()
+        with self._transaction() as connection:
+            connection.execute('DELETE FROM solutions')
+
+    def hit_rate(self):
+        lookups = self.metrics['hits'] + self.metrics['misses']
+        return self.metrics['hits'] / lookups if lookups else 0.0
+
+    def __str__(self):
+        return 'SolutionCache {}: {} entries, {} bytes, {} hits, {} misses, {} evictions'.format(
+            self.path, len(self), self.size(), self.metrics['hits'], self.metrics['misses'], self.metrics['evictions'])
+
+
+if __name__ == "__main__":
+    import tempfile
+    from linsys import LinearSystem
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = SolutionCache(os.path.join(directory, 'solutions.db'))
+        s = LinearSystem.from_augmented_matrix([[1, 1, 1, 6], [0, 2, 5, -4], [2, 5, -1, 27]])
+        for _ in range(3):
+            r = s.GaussianEliminationSolution(method=LinearSystem.PIVOTING_METHOD, cache=cache)
+        print(r)
+        print(cache)
+        print('hit rate {:.2f}'.format(cache.hit_rate()))
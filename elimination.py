@@ -0,0 +1,227 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from profiling import count
+
+
+def column_tolerances(matrix, eps=1e-10):
+    '''return eps times the largest magnitude in every column of matrix
+
+    an entry at or below the tolerance of its column counts as zero, so a
+    system and its column-scaled copies have the same pivots
+    '''
+    if matrix.shape[0] == 0:
+        return np.zeros(matrix.shape[1])
+    return eps * np.abs(matrix).max(axis=0)
+
+
+def eliminate_in_place(matrix, reduced=False, eps=1e-10):
+    '''gaussian elimination with partial pivoting on an augmented matrix, in place
+
+    the last column of matrix holds the constant terms. return the pivot
+    column of every nonzero row, rows below len(pivots) are zero rows.
+    with reduced=True the result is the reduced row echelon form(rref).
+    pivots and the constant terms left in the zero rows are zero when they
+    are at most eps relative to their column, see column_tolerances
+    '''
+    num_rows, num_columns = matrix.shape
+    num_variables = num_columns - 1
+    tolerances = column_tolerances(matrix, eps)
+    pivots = []
+    row = 0
+    for col in range(num_variables):
+        if row == num_rows:
+            break
+        count('pivot_searches')
+        pivot_row = row + int(np.argmax(np.abs(matrix[row:, col])))
+        if abs(matrix[pivot_row, col]) <= tolerances[col]:
+            matrix[row:, col] = 0
+            continue
+        if pivot_row != row:
+            count('row_swaps')
+            matrix[[row, pivot_row]] = matrix[[pivot_row, row]]
+        if reduced:
+            count('row_scalings')
+            count('row_additions', num_rows - 1)
+            matrix[row, col:] /= matrix[row, col]
+            factors = matrix[:, col].copy()
+            factors[row] = 0
+            matrix[:, col:] -= np.outer(factors, matrix[row, col:])
+        else:
+            count('row_additions', num_rows - row - 1)
+            factors = matrix[row + 1:, col] / matrix[row, col]
+            matrix[row + 1:, col:] -= np.outer(factors, matrix[row, col:])
+        matrix[row + 1:, col] = 0
+        pivots.append(col)
+        row += 1
+    leftover = matrix[row:, -1]
+    leftover[np.abs(leftover) <= tolerances[-1]] = 0
+    return pivots
+
+
+def rref_solution(rref, pivots, eps=0):
+    '''read the solution off an rref augmented matrix
+
+    a constant term above eps left in a zero row means no solutions,
+    eliminate_in_place already zeroes the negligible ones and eps=np.inf
+    skips the check. return (basepoint, direction_vectors) where
+    direction_vectors is a (free variables x dimension) array, or None if the
+    system has no solutions
+    '''
+    num_variables = rref.shape[1] - 1
+    rank = len(pivots)
+    if np.any(np.abs(rref[rank:, -1]) > eps):
+        return None
+
+    basepoint = np.zeros(num_variables, dtype=rref.dtype)
+    basepoint[pivots] = rref[:rank, -1]
+
+    pivot_set = set(pivots)
+    free_variables = [i for i in range(num_variables) if i not in pivot_set]
+    direction_vectors = np.zeros((len(free_variables), num_variables), dtype=rref.dtype)
+    for k, free in enumerate(free_variables):
+        direction_vectors[k, pivots] = -rref[:rank, free]
+        direction_vectors[k, free] = 1
+    return basepoint, direction_vectors
+
+
+def rank_revealing(coefficients, eps=1e-10, orthonormal=False):
+    '''reveal the rank, pivot columns and nullspace of a coefficient matrix from its rref
+
+    return (rank, pivots, nullspace) where the rows of the (n - rank) x n
+    array nullspace span the nullspace, one per free variable, or form an
+    orthonormal basis with orthonormal=True
+    '''
+    coefficients = np.asarray(coefficients, dtype=np.float64)
+    rref = np.hstack([coefficients, np.zeros((coefficients.shape[0], 1))])
+    pivots = eliminate_in_place(rref, reduced=True, eps=eps)
+    _, nullspace = rref_solution(rref, pivots, eps=np.inf)
+    if orthonormal and len(nullspace):
+        nullspace = np.linalg.qr(nullspace.T)[0].T
+    return len(pivots), pivots, nullspace
+
+
+def lu_factor(coefficients, eps=1e-10):
+    '''factor a (m x n) coefficient matrix as P A = L U with partial pivoting
+
+    L is unit lower triangular (m x m) and U is in row echelon form (m x n),
+    a pivot at most eps relative to its column counts as zero.
+    return (lower, upper, permutation, pivots) where permutation[i] is the
+    row of A that ends up in row i of U
+    '''
+    upper = np.array(coefficients, dtype=np.float64)
+    num_rows, num_variables = upper.shape
+    tolerances = column_tolerances(upper, eps)
+    lower = np.eye(num_rows)
+    permutation = np.arange(num_rows)
+    pivots = []
+    row = 0
+    for col in range(num_variables):
+        if row == num_rows:
+            break
+        count('pivot_searches')
+        pivot_row = row + int(np.argmax(np.abs(upper[row:, col])))
+        if abs(upper[pivot_row, col]) <= tolerances[col]:
+            upper[row:, col] = 0
+            continue
+        count('row_additions', num_rows - row - 1)
+        if pivot_row != row:
+            count('row_swaps')
+            upper[[row, pivot_row]] = upper[[pivot_row, row]]
+            lower[[row, pivot_row], :row] = lower[[pivot_row, row], :row]
+            permutation[[row, pivot_row]] = permutation[[pivot_row, row]]
+        factors = upper[row + 1:, col] / upper[row, col]
+        lower[row + 1:, row] = factors
+        upper[row + 1:, col:] -= np.outer(factors, upper[row, col:])
+        upper[row + 1:, col] = 0
+        pivots.append(col)
+        row += 1
+    return lower, upper, permutation, pivots
+
+
+def blocked_lu_factor(coefficients, eps=1e-10, block_size=64, workers=1):
+    '''factor a square coefficient matrix as P A = L U with a blocked right-looking algorithm
+
+    the trailing-submatrix update of every block column is split into column
+    tiles of width block_size and sent to a pool of worker threads that share
+    the matrix in place (numpy releases the GIL inside matrix products). the
+    tiles do not depend on the number of workers, so every worker count gives
+    identical results. singular or non-square matrices fall back to lu_factor.
+    return (lower, upper, permutation, pivots) like lu_factor
+    '''
+    lu = np.array(coefficients, dtype=np.float64)
+    n = lu.shape[0]
+    if lu.ndim != 2 or lu.shape[1] != n:
+        return lu_factor(coefficients, eps=eps)
+    tolerances = column_tolerances(lu, eps)
+    permutation = np.arange(n)
+
+    def update_tile(tile, start, end, first_row):
+        lu[first_row:, tile[0]:tile[1]] -= lu[first_row:, start:end] @ lu[start:end, tile[0]:tile[1]]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, n, block_size):
+            end = min(start + block_size, n)
+            for col in range(start, end):
+                count('pivot_searches')
+                pivot_row = col + int(np.argmax(np.abs(lu[col:, col])))
+                if abs(lu[pivot_row, col]) <= tolerances[col]:
+                    return lu_factor(coefficients, eps=eps)
+                count('row_additions', n - col - 1)
+                if pivot_row != col:
+                    count('row_swaps')
+                    lu[[col, pivot_row]] = lu[[pivot_row, col]]
+                    permutation[[col, pivot_row]] = permutation[[pivot_row, col]]
+                lu[col + 1:, col] /= lu[col, col]
+                lu[col + 1:, col + 1:end] -= np.outer(lu[col + 1:, col], lu[col, col + 1:end])
+            if end == n:
+                break
+            for col in range(start, end):
+                lu[col + 1:end, end:] -= np.outer(lu[col + 1:end, col], lu[col, end:])
+            tiles = [(c, min(c + block_size, n)) for c in range(end, n, block_size)]
+            list(pool.map(lambda tile: update_tile(tile, start, end, end), tiles))
+
+    lower = np.tril(lu, -1) + np.eye(n)
+    upper = np.triu(lu)
+    return lower, upper, permutation, list(range(n))
+
+
+def back_substitute(upper, pivots, rhs):
+    '''solve the pivot rows of a row echelon matrix for every column of rhs, free variables are set to 0'''
+    num_variables = upper.shape[1]
+    solution = np.zeros((num_variables,) + rhs.shape[1:])
+    for k in reversed(range(len(pivots))):
+        col = pivots[k]
+        solution[col] = (rhs[k] - upper[k, col + 1:] @ solution[col + 1:]) / upper[k, col]
+    return solution
+
+
+def lu_nullspace(upper, pivots):
+    '''return the nullspace direction vectors of a row echelon matrix, one per free variable'''
+    num_variables = upper.shape[1]
+    pivot_set = set(pivots)
+    free_variables = [i for i in range(num_variables) if i not in pivot_set]
+    rank = len(pivots)
+    direction_vectors = np.zeros((len(free_variables), num_variables))
+    if free_variables:
+        rhs = -upper[:rank, free_variables]
+        direction_vectors[:] = back_substitute(upper, pivots, rhs).T
+        direction_vectors[np.arange(len(free_variables)), free_variables] = 1
+    return direction_vectors
+
+
+def lu_solve(lower, upper, permutation, pivots, rhs, eps=1e-10):
+    '''solve L U x = P b for every column of rhs by forward and back substitution
+
+    return (solutions, consistent) where consistent flags the columns of rhs
+    that have a solution, what is left in the zero rows has to be at most eps
+    relative to the largest constant term of the column
+    '''
+    rhs = np.array(rhs, dtype=np.float64)
+    y = rhs[permutation]
+    rank = len(pivots)
+    for k in range(rank):
+        y[k + 1:] -= np.multiply.outer(lower[k + 1:, k], y[k])
+    consistent = np.all(np.abs(y[rank:]) <= eps * np.abs(rhs).max(axis=0), axis=0)
+    return back_substitute(upper, pivots, y), consistent
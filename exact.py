@@ -0,0 +1,101 @@
+from decimal import Decimal
+from fractions import Fraction
+from math import lcm
+
+from profiling import count
+
+
+def to_fraction(x):
+    '''convert an int, float, Decimal, string or Fraction to an exact Fraction'''
+    if isinstance(x, Fraction):
+        return x
+    return Fraction(x)
+
+
+def fraction_to_decimal(x):
+    '''round a Fraction to a Decimal in the current context'''
+    return Decimal(x.numerator) / Decimal(x.denominator)
+
+
+def integer_rows(rows):
+    '''scale every row of Fractions by the lcm of its denominators, returning rows of ints'''
+    out = []
+    for row in rows:
+        row = [to_fraction(x) for x in row]
+        scale = lcm(*[x.denominator for x in row])
+        out.append([x.numerator * (scale // x.denominator) for x in row])
+    return out
+
+
+def bareiss_rref(rows):
+    '''fraction-free gauss-jordan (Bareiss) elimination on integer augmented rows, in place
+
+    every division is exact, so intermediate entries stay minors of the input
+    and their size is bounded. at the end each pivot entry equals the returned
+    divisor and rows / divisor is the reduced row echelon form(rref).
+    return (pivots, divisor)
+    '''
+    num_rows = len(rows)
+    num_variables = len(rows[0]) - 1
+    previous = 1
+    pivots = []
+    r = 0
+    for col in range(num_variables):
+        if r == num_rows:
+            break
+        count('pivot_searches')
+        pivot_row = next((i for i in range(r, num_rows) if rows[i][col] != 0), None)
+        if pivot_row is None:
+            continue
+        if pivot_row != r:
+            count('row_swaps')
+        count('row_additions', num_rows - 1)
+        rows[r], rows[pivot_row] = rows[pivot_row], rows[r]
+        pivot = rows[r]
+        p = pivot[col]
+        for i in range(num_rows):
+            if i == r:
+                continue
+            row = rows[i]
+            a = row[col]
+            rows[i] = [(p * x - a * y) // previous for x, y in zip(row, pivot)]
+        previous = p
+        pivots.append(col)
+        r += 1
+    return pivots, previous
+
+
+def exact_rref(augmented_rows):
+    '''compute the exact rref of augmented rows of numbers, return (rref rows of Fractions, pivots)'''
+    rows = integer_rows(augmented_rows)
+    pivots, divisor = bareiss_rref(rows)
+    return [[Fraction(x, divisor) for x in row] for row in rows], pivots
+
+
+def exact_solution(rref, pivots, check=True):
+    '''read the exact solution off an rref of Fractions
+
+    return (basepoint, direction_vectors) as lists of Fractions, or None if
+    the system has no solutions. with check=False the constant terms left in
+    the zero rows are ignored and the solution of the pivot rows is returned
+    '''
+    num_variables = len(rref[0]) - 1
+    rank = len(pivots)
+    if check and any(row[-1] != 0 for row in rref[rank:]):
+        return None
+
+    basepoint = [Fraction(0)] * num_variables
+    for k, col in enumerate(pivots):
+        basepoint[col] = rref[k][-1]
+
+    pivot_set = set(pivots)
+    direction_vectors = []
+    for free in range(num_variables):
+        if free in pivot_set:
+            continue
+        direction = [Fraction(0)] * num_variables
+        for k, col in enumerate(pivots):
+            direction[col] = -rref[k][free]
+        direction[free] = Fraction(1)
+        direction_vectors.append(direction)
+    return basepoint, direction_vectors
@@ -1,11 +1,69 @@
 from decimal import Decimal, getcontext
 
-from vector import Vector
+import numpy as np
+
+from vector import Vector, VectorBatch
+from profiling import count
 
 getcontext().prec = 30
 
+NOT_FINITE_ROW_MSG = 'Rows with an infinite or nan entry have no canonical form'
+
+
+class _NotComputed(object):
+
+    __slots__ = ()
+
+    def __reduce__(self):
+        # pickled and copied by name, so identity checks hold after a round trip
+        return '_NOT_COMPUTED'
+
+
+# a basepoint is a Vector or None, so a sentinel marks one that is not computed yet
+_NOT_COMPUTED = _NotComputed()
+
+
+class LazyBasepoint(object):
+    '''normal vector and constant term whose basepoint is computed on first access
+
+    setting either one marks the basepoint to be recomputed, subclasses
+    provide compute_basepoint
+    '''
+
+    __slots__ = ('_normal_vector', '_constant_term', '_basepoint')
+
+    @property
+    def normal_vector(self):
+        return self._normal_vector
+
+    @normal_vector.setter
+    def normal_vector(self, normal_vector):
+        self._normal_vector = normal_vector
+        self._basepoint = _NOT_COMPUTED
+
+    @property
+    def constant_term(self):
+        return self._constant_term
+
+    @constant_term.setter
+    def constant_term(self, constant_term):
+        self._constant_term = constant_term
+        self._basepoint = _NOT_COMPUTED
 
-class Hyperplane(object):
+    @property
+    def basepoint(self):
+        if self._basepoint is _NOT_COMPUTED:
+            self._basepoint = self.compute_basepoint()
+        return self._basepoint
+
+    def set_basepoint(self):
+        '''mark the basepoint to be recomputed on next access'''
+        self._basepoint = _NOT_COMPUTED
+
+
+class Hyperplane(LazyBasepoint):
+
+    __slots__ = ('dimension',)
 
     NO_NONZERO_ELTS_FOUND_MSG = 'No nonzero elements found'
     EITHER_DIM_OR_NORMAL_VEC_MUST_BE_PROVIDE_MSG = 'Either the dimension or the normal vector must be provided'
@@ -27,7 +85,9 @@ class Hyperplane(object):
 
         self.set_basepoint()
 
-    def set_basepoint(self):
+    def compute_basepoint(self):
+        '''compute a point lying on the hyperplane'''
+        count('basepoint_computations')
         try:
             n = self.normal_vector.coordinates
             c = self.constant_term
@@ -37,11 +97,11 @@ class Hyperplane(object):
             initial_coefficient = n[initial_index]
 
             basepoint_coords[initial_index] = Decimal(c) / initial_coefficient
-            self.basepoint = Vector(basepoint_coords)
+            return Vector(basepoint_coords)
 
         except Exception as e:
             if str(e) == self.NO_NONZERO_ELTS_FOUND_MSG:
-                self.basepoint = None
+                return None
             else:
                 raise e
 
@@ -109,6 +169,123 @@ class Hyperplane(object):
             base_vector = self.basepoint - p.basepoint
             return base_vector.is_orthogonal_to(self.normal_vector)
 
+    def canonical_form(self, quantum=1e-9):
+        '''return the unit normal and constant term, signed and quantized to quantum, as a tuple of ints
+
+        it is a key for dedupe, not a hash: __eq__ compares with the angle
+        tolerance of is_parallel_to, so equal objects may quantize apart
+        '''
+        coefficients = np.array([[float(c) for c in self.normal_vector.coordinates]])
+        return tuple(canonical_rows(coefficients, [float(self.constant_term)], quantum)[0].tolist())
+
+
+def canonical_rows(coefficients, constant_terms, quantum=1e-9):
+    '''return the canonical form of every row [normal vector | constant term] as an (N x d+1) int array
+
+    each row is divided by the magnitude of its normal vector and signed so the
+    first coordinate larger than quantum is positive, then rounded to a
+    multiple of quantum. scaled copies of one hyperplane share a canonical form,
+    rows with a zero normal vector are only quantized. when some multiple
+    does not fit in int64 the array holds python ints instead (dtype object)
+    '''
+    coefficients = np.asarray(coefficients, dtype=np.float64)
+    constant_terms = np.asarray(constant_terms, dtype=np.float64)
+    if not (np.all(np.isfinite(coefficients)) and np.all(np.isfinite(constant_terms))):
+        raise Exception(NOT_FINITE_ROW_MSG)
+    magnitude = np.linalg.norm(coefficients, axis=1)
+    magnitude[magnitude == 0] = 1
+    rows = np.hstack([coefficients, constant_terms.reshape(-1, 1)]) / magnitude.reshape(-1, 1)
+    significant = np.abs(rows[:, :-1]) > quantum
+    first = rows[np.arange(len(rows)), significant.argmax(axis=1)]
+    sign = np.where(significant.any(axis=1) & (first < 0), -1.0, 1.0)
+    multiples = np.round(rows * sign.reshape(-1, 1) / quantum)
+    if not np.all(np.isfinite(multiples)):
+        raise Exception(NOT_FINITE_ROW_MSG)
+    if np.abs(multiples).max(initial=0) < 2.0 ** 63:
+        return multiples.astype(np.int64)
+    # past 2 ** 53 every float is an integer already, so int() is exact where astype would wrap
+    keys = np.empty(multiples.shape, dtype=object)
+    keys[...] = [[int(x) for x in row] for row in multiples.tolist()]
+    return keys
+
+
+def dedupe(hyperplanes, quantum=1e-9):
+    '''drop hyperplanes whose canonical form was already seen, keeping the first of each'''
+    seen = set()
+    unique = []
+    for p in hyperplanes:
+        key = p.canonical_form(quantum)
+        if key not in seen:
+            seen.add(key)
+            unique.append(p)
+    return unique
+
+
+class HyperplaneSet(object):
+
+    __slots__ = ('coefficients', 'constant_terms', 'dimension')
+
+    ALL_HYPERPLANES_MUST_BE_IN_SAME_DIM_MSG = 'All hyperplanes in the set should live in the same dimension'
+
+    def __init__(self, coefficients, constant_terms):
+        '''store N hyperplanes as one (N x d) coefficient matrix and one vector of N constant terms'''
+        coefficients = np.array(coefficients, dtype=np.float64)
+        constant_terms = np.array(constant_terms, dtype=np.float64)
+        if coefficients.ndim != 2 or constant_terms.shape != (coefficients.shape[0],):
+            raise Exception(self.ALL_HYPERPLANES_MUST_BE_IN_SAME_DIM_MSG)
+        self.coefficients = coefficients
+        self.constant_terms = constant_terms
+        self.dimension = coefficients.shape[1]
+
+    @classmethod
+    def from_hyperplanes(cls, hyperplanes):
+        '''pack a list of hyperplanes into one set'''
+        try:
+            d = hyperplanes[0].dimension
+            for p in hyperplanes:
+                assert p.dimension == d
+        except AssertionError:
+            raise Exception(cls.ALL_HYPERPLANES_MUST_BE_IN_SAME_DIM_MSG)
+        return cls([[float(c) for c in p.normal_vector.coordinates] for p in hyperplanes],
+                   [float(p.constant_term) for p in hyperplanes])
+
+    def to_hyperplanes(self):
+        return [self[i] for i in range(len(self))]
+
+    def __len__(self):
+        return self.coefficients.shape[0]
+
+    def __getitem__(self, i):
+        return Hyperplane(normal_vector=Vector(self.coefficients[i].tolist()),
+                          constant_term=self.constant_terms[i])
+
+    def __str__(self):
+        return 'HyperplaneSet: {} hyperplanes of dimension {}'.format(len(self), self.dimension)
+
+    def augmented_matrix(self):
+        '''return the (N x d+1) augmented matrix [A | b]'''
+        return np.hstack([self.coefficients, self.constant_terms.reshape(-1, 1)])
+
+    def first_nonzero_indices(self, eps=1e-30):
+        '''return the first nonzero index of every normal vector, -1 for zero normal vectors'''
+        nonzero = np.abs(self.coefficients) >= eps
+        return np.where(nonzero.any(axis=1), nonzero.argmax(axis=1), -1)
+
+    def basepoints(self, eps=1e-30):
+        '''return the basepoint of every hyperplane as an (N x d) array, rows of nan for zero normal vectors'''
+        indices = self.first_nonzero_indices(eps)
+        rows = np.arange(len(self))
+        basepoints = np.zeros_like(self.coefficients)
+        has_basepoint = indices >= 0
+        rows, indices = rows[has_basepoint], indices[has_basepoint]
+        basepoints[rows, indices] = self.constant_terms[rows] / self.coefficients[rows, indices]
+        basepoints[~has_basepoint] = np.nan
+        return basepoints
+
+    def is_paralle_to(self, p):
+        '''judge every hyperplane in the set is parallel to hyperplane p or not'''
+        return VectorBatch(self.coefficients).is_parallel_to(p.normal_vector)
+
 
 class MyDecimal(Decimal):
 
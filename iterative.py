@@ -0,0 +1,164 @@
+import numpy as np
+
+from sparse import SparseMatrix
+
+
+class MatrixOperator(object):
+
+    MATRIX_MUST_BE_SQUARE_MSG = 'Iterative solvers need a square coefficient matrix'
+    ZERO_DIAGONAL_MSG = 'The coefficient matrix has a zero on its diagonal'
+
+    def __init__(self, matrix):
+        '''wrap a dense 2-D array or a SparseMatrix so solvers only need matrix-vector products'''
+        if isinstance(matrix, SparseMatrix):
+            self.indptr, self.indices, self.data = matrix.to_csr()
+            self.row_ids = np.repeat(np.arange(matrix.shape[0]), np.diff(self.indptr))
+            self.dense = None
+        else:
+            self.dense = np.asarray(matrix, dtype=np.float64)
+        self.shape = matrix.shape
+        if self.shape[0] != self.shape[1]:
+            raise Exception(self.MATRIX_MUST_BE_SQUARE_MSG)
+
+    def matvec(self, x):
+        '''return A x'''
+        if self.dense is not None:
+            return self.dense @ x
+        return np.bincount(self.row_ids, weights=self.data * x[self.indices], minlength=self.shape[0])
+
+    def row(self, i):
+        '''return (column indices, values) of the nonzeros of row i'''
+        if self.dense is not None:
+            return slice(None), self.dense[i]
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.indices[start:end], self.data[start:end]
+
+    def diagonal(self):
+        if self.dense is not None:
+            diagonal = np.diag(self.dense).copy()
+        else:
+            diagonal = np.zeros(self.shape[0])
+            for i in range(self.shape[0]):
+                columns, values = self.row(i)
+                diagonal[i] = values[columns == i].sum()
+        if np.any(diagonal == 0):
+            raise Exception(self.ZERO_DIAGONAL_MSG)
+        return diagonal
+
+
+class IterativeResult(object):
+
+    def __init__(self, solution, residuals, converged):
+        self.solution = solution
+        self.residuals = residuals
+        self.iterations = len(residuals) - 1
+        self.converged = converged
+
+    def __str__(self):
+        return 'Iterative solution after {} iterations ({}), residual {:.3e}'.format(
+            self.iterations, 'converged' if self.converged else 'not converged', self.residuals[-1])
+
+
+def _start(operator, b, x0):
+    b = np.asarray(b, dtype=np.float64)
+    if isinstance(x0, IterativeResult):
+        x0 = x0.solution
+    x = np.zeros(operator.shape[1]) if x0 is None else np.array(x0, dtype=np.float64)
+    b_norm = np.linalg.norm(b)
+    return b, x, b_norm if b_norm > 0 else 1.0
+
+
+def jacobi(operator, b, x0=None, tol=1e-10, max_iterations=1000):
+    '''solve A x = b with jacobi iteration, A should be diagonally dominant'''
+    b, x, b_norm = _start(operator, b, x0)
+    diagonal = operator.diagonal()
+    residual = b - operator.matvec(x)
+    residuals = [np.linalg.norm(residual)]
+    while residuals[-1] / b_norm > tol and len(residuals) <= max_iterations:
+        x += residual / diagonal
+        residual = b - operator.matvec(x)
+        residuals.append(np.linalg.norm(residual))
+    return IterativeResult(x, residuals, residuals[-1] / b_norm <= tol)
+
+
+def sor(operator, b, x0=None, omega=1.0, tol=1e-10, max_iterations=1000):
+    '''solve A x = b with successive over-relaxation, omega=1 is gauss-seidel'''
+    b, x, b_norm = _start(operator, b, x0)
+    diagonal = operator.diagonal()
+    residuals = [np.linalg.norm(b - operator.matvec(x))]
+    while residuals[-1] / b_norm > tol and len(residuals) <= max_iterations:
+        for i in range(operator.shape[0]):
+            columns, values = operator.row(i)
+            x[i] += omega * (b[i] - values @ x[columns]) / diagonal[i]
+        residuals.append(np.linalg.norm(b - operator.matvec(x)))
+    return IterativeResult(x, residuals, residuals[-1] / b_norm <= tol)
+
+
+def gauss_seidel(operator, b, x0=None, tol=1e-10, max_iterations=1000):
+    '''solve A x = b with gauss-seidel iteration'''
+    return sor(operator, b, x0=x0, omega=1.0, tol=tol, max_iterations=max_iterations)
+
+
+def conjugate_gradient(operator, b, x0=None, tol=1e-10, max_iterations=1000):
+    '''solve A x = b with the conjugate gradient method, A should be symmetric positive definite'''
+    b, x, b_norm = _start(operator, b, x0)
+    residual = b - operator.matvec(x)
+    direction = residual.copy()
+    rho = residual @ residual
+    residuals = [np.sqrt(rho)]
+    while residuals[-1] / b_norm > tol and len(residuals) <= max_iterations:
+        Ad = operator.matvec(direction)
+        alpha = rho / (direction @ Ad)
+        x += alpha * direction
+        residual -= alpha * Ad
+        rho, previous_rho = residual @ residual, rho
+        direction = residual + (rho / previous_rho) * direction
+        residuals.append(np.sqrt(rho))
+    return IterativeResult(x, residuals, residuals[-1] / b_norm <= tol)
+
+
+def gmres(operator, b, x0=None, tol=1e-10, restart=30, max_iterations=1000):
+    '''solve A x = b with restarted GMRES, max_iterations counts inner iterations'''
+    b, x, b_norm = _start(operator, b, x0)
+    n = operator.shape[0]
+    restart = min(restart, n)
+    residual = b - operator.matvec(x)
+    residuals = [np.linalg.norm(residual)]
+    while residuals[-1] / b_norm > tol and len(residuals) <= max_iterations:
+        beta = np.linalg.norm(residual)
+        basis = np.zeros((restart + 1, n))
+        hessenberg = np.zeros((restart + 1, restart))
+        cosines = np.zeros(restart)
+        sines = np.zeros(restart)
+        g = np.zeros(restart + 1)
+        g[0] = beta
+        basis[0] = residual / beta
+        k = 0
+        while k < restart and len(residuals) <= max_iterations:
+            w = operator.matvec(basis[k])
+            for j in range(k + 1):
+                hessenberg[j, k] = w @ basis[j]
+                w -= hessenberg[j, k] * basis[j]
+            hessenberg[k + 1, k] = np.linalg.norm(w)
+            if hessenberg[k + 1, k] != 0:
+                basis[k + 1] = w / hessenberg[k + 1, k]
+            for j in range(k):
+                h_j, h_j1 = hessenberg[j, k], hessenberg[j + 1, k]
+                hessenberg[j, k] = cosines[j] * h_j + sines[j] * h_j1
+                hessenberg[j + 1, k] = -sines[j] * h_j + cosines[j] * h_j1
+            denominator = np.hypot(hessenberg[k, k], hessenberg[k + 1, k])
+            cosines[k] = hessenberg[k, k] / denominator
+            sines[k] = hessenberg[k + 1, k] / denominator
+            hessenberg[k, k] = denominator
+            hessenberg[k + 1, k] = 0
+            g[k + 1] = -sines[k] * g[k]
+            g[k] = cosines[k] * g[k]
+            residuals.append(abs(g[k + 1]))
+            k += 1
+            if residuals[-1] / b_norm <= tol:
+                break
+        y = np.linalg.solve(np.triu(hessenberg[:k, :k]), g[:k])
+        x += basis[:k].T @ y
+        residual = b - operator.matvec(x)
+        residuals[-1] = np.linalg.norm(residual)
+    return IterativeResult(x, residuals, residuals[-1] / b_norm <= tol)
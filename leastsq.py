@@ -0,0 +1,104 @@
+import numpy as np
+
+from elimination import back_substitute, lu_nullspace
+
+
+class LeastSquaresResult(object):
+
+    def __init__(self, solution, residual_norm, rank):
+        '''best-fit solution of a least-squares solve, with the norm of its residual and the rank of A'''
+        self.solution = solution
+        self.residual_norm = residual_norm
+        self.rank = rank
+
+    def __str__(self):
+        return 'Least-squares solution of rank {}, residual norm {:.3e}'.format(self.rank, self.residual_norm)
+
+
+def householder_in_place(matrix, num_pivot_columns=0):
+    '''triangularize matrix in place with Householder reflections, return the column permutation
+
+    the first num_pivot_columns columns are pivoted by largest remaining norm
+    (column-pivoted QR), the remaining columns keep their place, so the
+    constant terms of an augmented matrix can ride along as its last column.
+    below the diagonal the result is zero
+    '''
+    num_rows, num_columns = matrix.shape
+    permutation = np.arange(num_columns)
+    norms = (matrix[:, :num_pivot_columns] ** 2).sum(axis=0)
+    for k in range(min(num_rows, num_columns)):
+        if k < num_pivot_columns:
+            j = k + int(np.argmax(norms[k:]))
+            if j != k:
+                matrix[:, [k, j]] = matrix[:, [j, k]]
+                permutation[[k, j]] = permutation[[j, k]]
+                norms[[k, j]] = norms[[j, k]]
+        x = matrix[k:, k]
+        alpha = np.linalg.norm(x)
+        if alpha == 0:
+            continue
+        if x[0] > 0:
+            alpha = -alpha
+        v = x.copy()
+        v[0] -= alpha
+        v /= np.linalg.norm(v)
+        matrix[k:, k:] -= 2 * np.outer(v, v @ matrix[k:, k:])
+        matrix[k + 1:, k] = 0
+        if k < num_pivot_columns:
+            norms[k + 1:] = (matrix[k + 1:, k + 1:num_pivot_columns] ** 2).sum(axis=0)
+    return permutation
+
+
+def r_least_squares(r, eps=1e-10):
+    '''read the least-squares solution off the triangular factor [R | Q^T b] of an augmented matrix
+
+    the columns of R are scaled to unit norm and a column-pivoted QR of the
+    small factor reveals the rank: the number of diagonal entries above eps
+    times the largest one. return (basepoint, direction_vectors,
+    residual_norm, rank) where basepoint is the solution with the free
+    variables at 0 and the direction vectors span the nullspace of A
+    '''
+    num_variables = r.shape[1] - 1
+    r = np.array(r, dtype=np.float64)
+    scales = np.linalg.norm(r[:, :num_variables], axis=0)
+    scales[scales == 0] = 1
+    scales = 1 / scales
+    r[:, :num_variables] *= scales
+    permutation = householder_in_place(r, num_pivot_columns=num_variables)[:num_variables]
+
+    diagonal = np.abs(np.diagonal(r[:, :num_variables]))
+    rank = int(np.sum(diagonal > eps * diagonal.max())) if len(diagonal) and diagonal.max() > 0 else 0
+    upper = r[:rank, :num_variables]
+    pivots = list(range(rank))
+    basepoint = np.zeros(num_variables)
+    basepoint[permutation] = back_substitute(upper, pivots, r[:rank, -1])
+    direction_vectors = np.zeros((num_variables - rank, num_variables))
+    direction_vectors[:, permutation] = lu_nullspace(upper, pivots)
+    residual_norm = float(np.linalg.norm(r[rank:, -1]))
+    return basepoint * scales, direction_vectors * scales, residual_norm, rank
+
+
+def least_squares(matrix, eps=1e-10):
+    '''solve the least-squares problem of an augmented matrix [A | b] with Householder QR
+
+    return (basepoint, direction_vectors, residual_norm, rank) like r_least_squares
+    '''
+    r = np.array(matrix, dtype=np.float64)
+    householder_in_place(r)
+    return r_least_squares(r[:r.shape[1]], eps=eps)
+
+
+def tsqr_least_squares(blocks, num_variables, eps=1e-10):
+    '''solve the least-squares problem of augmented rows [A | b] streamed in row blocks (TSQR)
+
+    each block is stacked under the running triangular factor of the rows
+    seen so far and triangularized again, so only an (n + 1) x (n + 1)
+    factor and one block are in memory at a time. return (basepoint,
+    direction_vectors, residual_norm, rank) like r_least_squares
+    '''
+    r = np.zeros((0, num_variables + 1))
+    for block in blocks:
+        stack = np.vstack([r, np.asarray(block, dtype=np.float64)])
+        householder_in_place(stack)
+        r = stack[:num_variables + 1]
+    return r_least_squares(r, eps=eps)
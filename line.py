@@ -1,11 +1,16 @@
 from decimal import Decimal, getcontext
 
+import numpy as np
+
 from vector import Vector
+from hyperplane import LazyBasepoint
 
 getcontext().prec = 30
 
 
-class Line(object):
+class Line(LazyBasepoint):
+
+    __slots__ = ('dimension',)
 
     NO_NONZERO_ELTS_FOUND_MSG = 'No nonzero elements found'
 
@@ -23,7 +28,8 @@ class Line(object):
 
         self.set_basepoint()
 
-    def set_basepoint(self):
+    def compute_basepoint(self):
+        '''compute a point lying on the line'''
         try:
             n = self.normal_vector.coordinates
             c = self.constant_term
@@ -33,11 +39,11 @@ class Line(object):
             initial_coefficient = n[initial_index]
 
             basepoint_coords[initial_index] = c/initial_coefficient
-            self.basepoint = Vector(basepoint_coords)
+            return Vector(basepoint_coords)
 
         except Exception as e:
             if str(e) == Line.NO_NONZERO_ELTS_FOUND_MSG:
-                self.basepoint = None
+                return None
             else:
                 raise e
 
@@ -120,6 +126,77 @@ class Line(object):
             return [x_1, x_2]
 
 
+LINES_INTERSECT = 0
+LINES_PARALLEL = 1
+LINES_COINCIDENT = 2
+LINES_DEGENERATE = 3
+
+
+def lines_to_arrays(lines):
+    '''pack a list of lines into an (N x 2) coefficient array and an (N,) constant array'''
+    coefficients = np.array([[float(c) for c in l.normal_vector.coordinates] for l in lines], dtype=np.float64)
+    constant_terms = np.array([float(l.constant_term) for l in lines], dtype=np.float64)
+    return coefficients.reshape(-1, 2), constant_terms
+
+
+def _normalize(coefficients, constant_terms):
+    coefficients = np.asarray(coefficients, dtype=np.float64)
+    constant_terms = np.asarray(constant_terms, dtype=np.float64)
+    magnitude = np.hypot(coefficients[..., 0], coefficients[..., 1])
+    degenerate = magnitude == 0
+    magnitude = np.where(degenerate, 1, magnitude)
+    return coefficients / magnitude[..., None], constant_terms / magnitude, degenerate
+
+
+def _classify(n1, k1, zero1, n2, k2, zero2, eps):
+    A, B = n1[..., 0], n1[..., 1]
+    C, D = n2[..., 0], n2[..., 1]
+    det = A * D - B * C
+    parallel = np.abs(det) < eps
+    coincident = parallel & (np.abs(A * k2 - C * k1) < eps) & (np.abs(B * k2 - D * k1) < eps)
+    status = np.where(coincident, LINES_COINCIDENT, np.where(parallel, LINES_PARALLEL, LINES_INTERSECT))
+    status = np.where(zero1 | zero2, LINES_DEGENERATE, status)
+    safe_det = np.where(status == LINES_INTERSECT, det, 1)
+    points = np.stack([(D * k1 - B * k2) / safe_det, (-C * k1 + A * k2) / safe_det], axis=-1)
+    points[status != LINES_INTERSECT] = np.nan
+    return points, status
+
+
+def intersect_line_pairs(coefficients_a, constants_a, coefficients_b, constants_b, eps=1e-10, chunk_size=65536):
+    '''intersect line i of a with line i of b for every i
+
+    the parallel test is the determinant of the unit normal vectors, no trig.
+    return (points, status) where points is (N x 2) with nan rows for lines
+    that do not meet in one point and status holds LINES_INTERSECT,
+    LINES_PARALLEL, LINES_COINCIDENT or LINES_DEGENERATE (zero normal vector)
+    '''
+    n1, k1, zero1 = _normalize(coefficients_a, constants_a)
+    n2, k2, zero2 = _normalize(coefficients_b, constants_b)
+    num_pairs = len(k1)
+    points = np.empty((num_pairs, 2))
+    status = np.empty(num_pairs, dtype=np.int8)
+    for start in range(0, num_pairs, chunk_size):
+        chunk = slice(start, start + chunk_size)
+        points[chunk], status[chunk] = _classify(
+            n1[chunk], k1[chunk], zero1[chunk], n2[chunk], k2[chunk], zero2[chunk], eps)
+    return points, status
+
+
+def iter_all_pairs_intersections(coefficients_a, constants_a, coefficients_b, constants_b, eps=1e-10, chunk_size=1024):
+    '''intersect every line of a with every line of b, chunk_size lines of a at a time
+
+    yield (start, points, status) where points is (chunk x M x 2) and status
+    is (chunk x M) for lines start .. start + chunk of a against all M lines of b
+    '''
+    n1, k1, zero1 = _normalize(coefficients_a, constants_a)
+    n2, k2, zero2 = _normalize(coefficients_b, constants_b)
+    for start in range(0, len(k1), chunk_size):
+        chunk = slice(start, start + chunk_size)
+        points, status = _classify(n1[chunk, None], k1[chunk, None], zero1[chunk, None],
+                                   n2[None], k2[None], zero2[None], eps)
+        yield start, points, status
+
+
 class MyDecimal(Decimal):
 
     def is_near_zero(self, eps=1e-10):
@@ -137,4 +214,9 @@ if __name__ == '__main__':
 
     l5 = Line(Vector([1.182, 5.562]), 6.744)
     l6 = Line(Vector([1.773, 8.343]), 9.525)
-    print(l5.intersection_with(l6))
\ No newline at end of file
+    print(l5.intersection_with(l6))
+
+    a = lines_to_arrays([l1, l3, l5])
+    b = lines_to_arrays([l2, l4, l6])
+    points, status = intersect_line_pairs(a[0], a[1], b[0], b[1])
+    print(points, status)
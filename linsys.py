@@ -1,10 +1,25 @@
-from decimal import Decimal, getcontext
+from decimal import Decimal, getcontext, localcontext
+from fractions import Fraction
 from copy import deepcopy
+from hashlib import sha256
+from bisect import bisect_left
 
-from vector import Vector
+import numpy as np
+
+from vector import Vector, FLOAT64_BACKEND
 from plane import Plane
 from para import Parameterization
-from hyperplane import Hyperplane
+from hyperplane import Hyperplane, HyperplaneSet, canonical_rows
+from sysio import read_csv_matrix, read_npy_matrix, read_matrix_market
+from elimination import column_tolerances, eliminate_in_place, rref_solution, rank_revealing, lu_factor, blocked_lu_factor, lu_solve, lu_nullspace, back_substitute
+from sparse import SparseMatrix, reverse_cuthill_mckee, sparse_eliminate, sparse_solution
+from exact import to_fraction, fraction_to_decimal, exact_rref, exact_solution
+from iterative import MatrixOperator, jacobi, sor, gauss_seidel, conjugate_gradient, gmres
+from condition import (AdaptiveResult, equilibrate, condition_estimate, required_digits,
+                       FLOAT64_PRECISION, DECIMAL_PRECISION, EXACT_PRECISION, FLOAT64_DIGITS)
+from leastsq import LeastSquaresResult, least_squares, tsqr_least_squares
+from structured import detect_structure, structured_solve
+from profiling import profile, count, phase, TRIANGULARIZATION, BACK_SUBSTITUTION, PARAMETERIZATION, COPY
 getcontext().prec = 30
 
 
@@ -14,6 +29,19 @@ class LinearSystem(object):
     NO_SOLUTIONS_MSG = 'No solutions'
     INF_SOLUTIONS_MSG = 'Infinitely many solutions'
     INF_SOLUTIONS = False
+    UNKNOWN_METHOD_MSG = 'Unknown elimination method'
+
+    DECIMAL_METHOD = 'decimal'
+    PIVOTING_METHOD = 'pivoting'
+    SPARSE_METHOD = 'sparse'
+    EXACT_METHOD = 'exact'
+    BLOCKED_METHOD = 'blocked'
+    STRUCTURED_METHOD = 'structured'
+    # below this many variables dense elimination is as fast as structured_solve
+    STRUCTURED_MIN_VARIABLES = 64
+
+    ITERATIVE_SOLVERS = {'jacobi': jacobi, 'gauss_seidel': gauss_seidel, 'sor': sor,
+                         'cg': conjugate_gradient, 'gmres': gmres}
 
     def __init__(self, planes):
         try:
@@ -27,16 +55,148 @@ class LinearSystem(object):
         except AssertionError:
             raise Exception(self.ALL_PLANES_MUST_BE_IN_SAME_DIM_MSG)
 
+    @classmethod
+    def from_augmented_matrix(cls, matrix, copy=True):
+        '''build a linear system from an augmented matrix [A | b], hyperplanes are built on first access'''
+        if copy:
+            matrix = np.array(matrix, dtype=np.float64)
+        else:
+            matrix = np.asarray(matrix, dtype=np.float64)
+        if matrix.ndim != 2 or matrix.shape[0] == 0 or matrix.shape[1] < 2:
+            raise Exception(cls.ALL_PLANES_MUST_BE_IN_SAME_DIM_MSG)
+        system = cls.__new__(cls)
+        system._planes = None
+        system._matrix = matrix
+        system._sparse = None
+        system._structure = None
+        system.dimension = matrix.shape[1] - 1
+        return system
+
+    @classmethod
+    def from_csv(cls, path, delimiter=',', chunk_rows=65536, skip_header=False):
+        '''load a linear system from a csv file with one augmented row [A | b] per line'''
+        return cls.from_augmented_matrix(read_csv_matrix(
+            path, delimiter=delimiter, chunk_rows=chunk_rows, skip_header=skip_header), copy=False)
+
+    @classmethod
+    def from_npy(cls, path, mmap=True):
+        '''load a linear system from a .npy augmented matrix [A | b], memory-mapped without a copy by default'''
+        return cls.from_augmented_matrix(read_npy_matrix(path, mmap=mmap), copy=not mmap)
+
+    @classmethod
+    def from_matrix_market(cls, path, constant_terms_path=None):
+        '''load a linear system from a Matrix Market file
+
+        without constant_terms_path the file holds the augmented matrix [A | b],
+        otherwise it holds A and constant_terms_path holds b. coordinate files
+        give a sparse system
+        '''
+        matrix = read_matrix_market(path)
+        if constant_terms_path is not None:
+            constant_terms = np.ravel(read_matrix_market(constant_terms_path))
+        elif isinstance(matrix, SparseMatrix):
+            num_variables = matrix.shape[1] - 1
+            constant_terms = [row.pop(num_variables, 0.0) for row in matrix.rows]
+            matrix.shape = (matrix.shape[0], num_variables)
+        else:
+            return cls.from_augmented_matrix(matrix, copy=False)
+        if isinstance(matrix, SparseMatrix):
+            return cls.from_sparse(matrix, constant_terms)
+        return cls.from_augmented_matrix(np.hstack([matrix, np.reshape(constant_terms, (-1, 1))]), copy=False)
+
+    @classmethod
+    def from_hyperplane_set(cls, hyperplanes):
+        '''build a linear system from a HyperplaneSet without creating Hyperplane objects'''
+        return cls.from_augmented_matrix(hyperplanes.augmented_matrix())
+
+    def hyperplane_set(self):
+        '''return the equations of the system as a HyperplaneSet'''
+        matrix = self.augmented_matrix()
+        return HyperplaneSet(matrix[:, :-1], matrix[:, -1])
+
+    @classmethod
+    def from_sparse(cls, matrix, constant_terms):
+        '''build a linear system from a SparseMatrix of coefficients, hyperplanes are built on first access'''
+        if len(constant_terms) != matrix.shape[0] or matrix.shape[0] == 0:
+            raise Exception(cls.ALL_PLANES_MUST_BE_IN_SAME_DIM_MSG)
+        system = cls.__new__(cls)
+        system._planes = None
+        system._matrix = None
+        system._sparse = (matrix, [float(c) for c in constant_terms])
+        system._structure = None
+        system.dimension = matrix.shape[1]
+        return system
+
+    @property
+    def planes(self):
+        if self._planes is None:
+            self._planes = [Hyperplane(normal_vector=Vector(row[:-1].tolist()), constant_term=row[-1])
+                            for row in self.augmented_matrix(copy=False)]
+            self._matrix = None
+            self._sparse = None
+            self._structure = None
+        return self._planes
+
+    @planes.setter
+    def planes(self, planes):
+        self._planes = planes
+        self._matrix = None
+        self._sparse = None
+        self._structure = None
+
+    def augmented_matrix(self, copy=True):
+        '''return the augmented matrix [A | b] of the system as a float64 array
+
+        with copy=False a system built from a matrix returns a read-only view
+        of it instead of a copy, so callers that only read it never load a
+        memory-mapped file into memory
+        '''
+        if self._matrix is not None:
+            if copy:
+                return self._matrix.copy()
+            view = self._matrix.view()
+            view.flags.writeable = False
+            return view
+        if self._sparse is not None:
+            matrix, constant_terms = self._sparse
+            return np.hstack([matrix.to_dense(), np.reshape(constant_terms, (-1, 1))])
+        return np.array([[float(c) for c in p.normal_vector.coordinates] + [float(p.constant_term)]
+                         for p in self._planes], dtype=np.float64)
+
+    def exact_rows(self):
+        '''return the augmented rows of the system as exact Fractions'''
+        if self._planes is None:
+            return [[to_fraction(x) for x in row] for row in self.augmented_matrix(copy=False).tolist()]
+        return [[to_fraction(c) for c in p.normal_vector.coordinates] + [to_fraction(p.constant_term)]
+                for p in self._planes]
+
+    def sparse_matrix(self):
+        '''return a copy of the system as (SparseMatrix of coefficients, list of constant terms)'''
+        if self._sparse is not None:
+            matrix, constant_terms = self._sparse
+            return matrix.copy(), list(constant_terms)
+        if self._matrix is not None:
+            return SparseMatrix.from_dense(self._matrix[:, :-1]), self._matrix[:, -1].tolist()
+        matrix = SparseMatrix((len(self._planes), self.dimension))
+        for row, p in zip(matrix.rows, self._planes):
+            for j, c in enumerate(p.normal_vector.coordinates):
+                if c != 0:
+                    row[j] = float(c)
+        return matrix, [float(p.constant_term) for p in self._planes]
+
     def swap_rows(self, row1, row2):
+        count('row_swaps')
         self[row1], self[row2] = self[row2], self[row1]
 
     def multiply_coefficient_and_row(self, coefficient, row):
+        count('row_scalings')
         constant_term = self.planes[row].constant_term * coefficient
         normal_vector = self.planes[row].normal_vector * coefficient
         self.planes[row] = self.planes[row].__class__(
             normal_vector=normal_vector, constant_term=constant_term)
 
     def add_multiple_times_row_to_row(self, coefficient, row_to_add, row_to_be_added_to):
+        count('row_additions')
         self.planes[
             row_to_be_added_to].constant_term += self.planes[row_to_add].constant_term * coefficient
         self.planes[row_to_be_added_to].normal_vector = self.planes[
@@ -44,6 +204,7 @@ class LinearSystem(object):
         self.planes[row_to_be_added_to].set_basepoint()
 
     def indices_of_first_nonzero_terms_in_each_row(self):
+        count('pivot_searches')
         num_equations = len(self)
         num_variables = self.dimension
 
@@ -61,7 +222,11 @@ class LinearSystem(object):
         return indices
 
     def __len__(self):
-        return len(self.planes)
+        if self._matrix is not None:
+            return self._matrix.shape[0]
+        if self._sparse is not None:
+            return self._sparse[0].shape[0]
+        return len(self._planes)
 
     def __getitem__(self, i):
         return self.planes[i]
@@ -82,43 +247,337 @@ class LinearSystem(object):
         return ret
 
     def compute_triangular_form(self):
-        system = deepcopy(self)
-        for row_idx in range(len(system) - 1):
-            indices = system.indices_of_first_nonzero_terms_in_each_row()
-            first_nonzero_row = row_idx + 1
-            while row_idx != indices[row_idx] and first_nonzero_row < len(system):
-                if row_idx == indices[first_nonzero_row]:
-                    system.swap_rows(row_idx, first_nonzero_row)
-                    indices = system.indices_of_first_nonzero_terms_in_each_row()
-                first_nonzero_row += 1
-            if row_idx == indices[row_idx]:
-                for row_to_compute in range(row_idx + 1, len(system)):
-                    coefficient = system.planes[row_to_compute].normal_vector.coordinates[
-                        row_idx] / system.planes[row_idx].normal_vector.coordinates[row_idx] * Decimal(-1)
-                    system.add_multiple_times_row_to_row(
-                        coefficient, row_idx, row_to_compute)
+        with phase(COPY):
+            count('deepcopies')
+            system = deepcopy(self)
+        with phase(TRIANGULARIZATION):
+            for row_idx in range(len(system) - 1):
+                indices = system.indices_of_first_nonzero_terms_in_each_row()
+                first_nonzero_row = row_idx + 1
+                while row_idx != indices[row_idx] and first_nonzero_row < len(system):
+                    if row_idx == indices[first_nonzero_row]:
+                        system.swap_rows(row_idx, first_nonzero_row)
+                        indices = system.indices_of_first_nonzero_terms_in_each_row()
+                    first_nonzero_row += 1
+                if row_idx == indices[row_idx]:
+                    for row_to_compute in range(row_idx + 1, len(system)):
+                        coefficient = system.planes[row_to_compute].normal_vector.coordinates[
+                            row_idx] / system.planes[row_idx].normal_vector.coordinates[row_idx] * Decimal(-1)
+                        system.add_multiple_times_row_to_row(
+                            coefficient, row_idx, row_to_compute)
         return system
 
     def compute_rref(self):
         rref = self.compute_triangular_form()
-        for row_idx in range(len(rref))[::-1]:
-            indices = rref.indices_of_first_nonzero_terms_in_each_row()
-            if indices[row_idx] != -1:
-                for row_to_compute in range(row_idx):
-                    coefficient = rref.planes[row_to_compute].normal_vector.coordinates[indices[
-                        row_idx]] / rref.planes[row_idx].normal_vector.coordinates[indices[row_idx]] * Decimal(-1)
-                    rref.add_multiple_times_row_to_row(
-                        coefficient, row_idx, row_to_compute)
-                    scalar = Decimal(
-                        1) / Decimal(rref.planes[row_idx].normal_vector.coordinates[indices[row_idx]])
-                    rref.multiply_coefficient_and_row(scalar, row_idx)
-        if indices[0] != -1:
-            scalar = Decimal(
-                1) / Decimal(rref.planes[0].normal_vector.coordinates[indices[0]])
-            rref.multiply_coefficient_and_row(scalar, 0)
+        with phase(BACK_SUBSTITUTION):
+            for row_idx in range(len(rref))[::-1]:
+                indices = rref.indices_of_first_nonzero_terms_in_each_row()
+                if indices[row_idx] != -1:
+                    for row_to_compute in range(row_idx):
+                        coefficient = rref.planes[row_to_compute].normal_vector.coordinates[indices[
+                            row_idx]] / rref.planes[row_idx].normal_vector.coordinates[indices[row_idx]] * Decimal(-1)
+                        rref.add_multiple_times_row_to_row(
+                            coefficient, row_idx, row_to_compute)
+                        scalar = Decimal(
+                            1) / Decimal(rref.planes[row_idx].normal_vector.coordinates[indices[row_idx]])
+                        rref.multiply_coefficient_and_row(scalar, row_idx)
+            if indices[0] != -1:
+                scalar = Decimal(
+                    1) / Decimal(rref.planes[0].normal_vector.coordinates[indices[0]])
+                rref.multiply_coefficient_and_row(scalar, 0)
         return rref
 
-    def GaussianEliminationSolution(self, esp=1e-10):
+    def deduplicated(self, quantum=1e-9):
+        '''return the system without duplicate equations or scaled copies of earlier equations'''
+        matrix = self.augmented_matrix(copy=False)
+        keys = canonical_rows(matrix[:, :-1], matrix[:, -1], quantum)
+        if keys.dtype == object:
+            # python int keys past the int64 range, np.unique cannot sort them by row
+            first = dict()
+            for i, key in enumerate(map(tuple, keys.tolist())):
+                first.setdefault(key, i)
+            keep = np.fromiter(first.values(), dtype=np.int64)
+        else:
+            _, first = np.unique(keys, axis=0, return_index=True)
+            keep = np.sort(first)
+        if self._planes is not None:
+            return self.__class__([self._planes[i] for i in keep])
+        if self._sparse is not None:
+            sparse, constant_terms = self._sparse
+            rows = SparseMatrix((len(keep), sparse.shape[1]), [dict(sparse.rows[i]) for i in keep])
+            return self.__class__.from_sparse(rows, [constant_terms[i] for i in keep])
+        return self.__class__.from_augmented_matrix(matrix[keep])
+
+    def compute_triangular_form_matrix(self, eps=1e-10):
+        '''compute triangular form of the augmented matrix in place with partial pivoting, return (matrix, pivots)'''
+        matrix = self.augmented_matrix()
+        with phase(TRIANGULARIZATION):
+            pivots = eliminate_in_place(matrix, eps=eps)
+        return matrix, pivots
+
+    def compute_rref_matrix(self, eps=1e-10):
+        '''compute rref of the augmented matrix in place with partial pivoting, return (matrix, pivots)'''
+        matrix = self.augmented_matrix()
+        with phase(TRIANGULARIZATION):
+            pivots = eliminate_in_place(matrix, reduced=True, eps=eps)
+        return matrix, pivots
+
+    def compute_sparse_elimination(self, eps=1e-10):
+        '''eliminate the sparse form of the system in reverse Cuthill-McKee column order, return (matrix, constant_terms, pivots)'''
+        matrix, constant_terms = self.sparse_matrix()
+        with phase(TRIANGULARIZATION):
+            pivots = sparse_eliminate(matrix, constant_terms,
+                                      ordering=reverse_cuthill_mckee(matrix), eps=eps)
+        return matrix, constant_terms, pivots
+
+    def compute_rref_exact(self):
+        '''compute the exact rref with fraction-free Bareiss elimination, return (rows of Fractions, pivots)'''
+        rows = self.exact_rows()
+        with phase(TRIANGULARIZATION):
+            return exact_rref(rows)
+
+    def fingerprint(self, *settings, constant_terms=True):
+        '''return a hex digest of the coefficients, constant terms and settings of the system, the key of a SolutionCache
+
+        the digest covers the exact values in the form the system is stored
+        in and the current decimal precision, so any change that can change a
+        solution changes the key
+        '''
+        digest = sha256(repr((self.dimension, getcontext().prec, constant_terms) + settings).encode())
+        if self._sparse is not None:
+            matrix, terms = self._sparse
+            digest.update(repr((matrix.shape, [sorted(row.items()) for row in matrix.rows])).encode())
+            rows = [terms] if constant_terms else []
+        elif self._matrix is not None:
+            digest.update(repr(self._matrix.shape).encode())
+            digest.update(np.ascontiguousarray(self._matrix[:, :-1]).tobytes())
+            rows = [self._matrix[:, -1].tolist()] if constant_terms else []
+        else:
+            rows = [[str(c) for c in p.normal_vector.coordinates] for p in self._planes]
+            if constant_terms:
+                rows.append([str(p.constant_term) for p in self._planes])
+        digest.update(repr(rows).encode())
+        return digest.hexdigest()
+
+    def coefficients(self):
+        '''return the coefficient matrix, as the SparseMatrix itself for sparse systems and a read-only float64 array otherwise'''
+        if self._sparse is not None:
+            return self._sparse[0]
+        return self.augmented_matrix(copy=False)[:, :-1]
+
+    def structure(self):
+        '''detect the bandwidths and independent blocks of the coefficient matrix, return a SystemStructure
+
+        systems built from a matrix or a SparseMatrix are detected once and
+        keep the result, the hyperplanes of other systems can still change in
+        place so they are detected on every call
+        '''
+        if self._planes is not None:
+            return detect_structure(self.coefficients())
+        if self._structure is None:
+            self._structure = detect_structure(self.coefficients())
+        return self._structure
+
+    def is_structured(self):
+        '''judge structured_solve beats dense elimination on the system or not
+
+        true for systems of at least STRUCTURED_MIN_VARIABLES variables whose
+        coefficient matrix is tridiagonal, banded or splits into independent
+        blocks. a matrix more than half full is neither, so it is rejected
+        before the structure is detected
+        '''
+        if self.dimension < self.STRUCTURED_MIN_VARIABLES:
+            return False
+        if self._structure is None:
+            if self._sparse is not None:
+                nnz = self._sparse[0].nnz()
+            elif self._matrix is not None:
+                nnz = np.count_nonzero(self._matrix[:, :-1])
+            else:
+                nnz = sum(sum(1 for c in p.normal_vector.coordinates if c != 0) for p in self._planes)
+            if nnz > 0.5 * len(self) * self.dimension:
+                return False
+        structure = self.structure()
+        return structure.is_tridiagonal() or structure.is_banded() or len(structure.blocks) > 1
+
+    def rank_and_nullspace(self, eps=1e-10, orthonormal=False):
+        '''return (rank, pivot columns, nullspace basis) of the coefficient matrix, the basis as one array with a vector per row'''
+        return rank_revealing(self.augmented_matrix(copy=False)[:, :-1], eps=eps, orthonormal=orthonormal)
+
+    def rank_exact(self):
+        '''return the exact rank of the coefficient matrix'''
+        rows = [row[:-1] + [0] for row in self.exact_rows()]
+        return len(exact_rref(rows)[1])
+
+    def solution_from_fractions(self, basepoint, direction_vectors):
+        '''wrap an exact basepoint and direction vectors as a solution system or Parameterization of Decimals'''
+        with phase(PARAMETERIZATION):
+            basepoint = [fraction_to_decimal(x) for x in basepoint]
+            if len(direction_vectors) == 0:
+                return self.__class__([Hyperplane(normal_vector=Vector([1 if j == i else 0 for j in range(self.dimension)]),
+                                                  constant_term=x) for i, x in enumerate(basepoint)])
+            self.INF_SOLUTIONS = True
+            return Parameterization(Vector(basepoint),
+                                    [Vector([fraction_to_decimal(x) for x in d]) for d in direction_vectors])
+
+    def solution_from_arrays(self, basepoint, direction_vectors):
+        '''wrap a basepoint and direction vectors in the forms GaussianEliminationSolution returns'''
+        with phase(PARAMETERIZATION):
+            if len(direction_vectors) == 0:
+                identity = SparseMatrix((self.dimension, self.dimension),
+                                        [{i: 1.0} for i in range(self.dimension)])
+                return self.__class__.from_sparse(identity, basepoint)
+            self.INF_SOLUTIONS = True
+            return Parameterization(Vector(basepoint, backend=FLOAT64_BACKEND),
+                                    np.asarray(direction_vectors, dtype=np.float64))
+
+    def coefficient_operator(self):
+        '''return the coefficient matrix as a MatrixOperator, keeping sparse systems sparse'''
+        if self._sparse is not None:
+            return MatrixOperator(self._sparse[0])
+        return MatrixOperator(self.augmented_matrix(copy=False)[:, :-1])
+
+    def constant_terms(self):
+        '''return the constant terms of the system as a float64 array'''
+        if self._sparse is not None:
+            return np.array(self._sparse[1])
+        return np.array(self.augmented_matrix(copy=False)[:, -1])
+
+    def IterativeSolution(self, solver='cg', x0=None, tol=1e-10, max_iterations=1000, **options):
+        '''solve a square system iteratively, x0 can be a previous IterativeResult to warm start from'''
+        if solver not in self.ITERATIVE_SOLVERS:
+            raise Exception(self.UNKNOWN_METHOD_MSG)
+        return self.ITERATIVE_SOLVERS[solver](self.coefficient_operator(), self.constant_terms(),
+                                              x0=x0, tol=tol, max_iterations=max_iterations, **options)
+
+    def factorize(self, eps=1e-10, workers=1, block_size=None, cache=None):
+        '''compute a reusable LU factorization of the coefficient matrix, blocked and multi-threaded when workers > 1
+
+        with a SolutionCache the factors are looked up by the fingerprint of
+        the coefficients and only computed on a miss
+        '''
+        if cache is None:
+            return LUFactorization(self, eps=eps, workers=workers, block_size=block_size)
+        blocked = (block_size or 64) if workers > 1 or block_size is not None else None
+        key = self.fingerprint('lu', eps, blocked, constant_terms=False)
+        factors = cache.get(key)
+        if factors is not None:
+            return LUFactorization(self, eps=eps, workers=workers, block_size=block_size, factors=factors)
+        lu = LUFactorization(self, eps=eps, workers=workers, block_size=block_size)
+        cache.put(key, (lu.lower, lu.upper, lu.permutation, lu.pivots))
+        return lu
+
+    def LeastSquaresSolution(self, eps=1e-10, block_rows=None):
+        '''solve the system in the least-squares sense with Householder QR, return a LeastSquaresResult
+
+        the solution is the unique best fit, or a Parameterization of all best
+        fits when A is rank deficient. with block_rows the rows are streamed
+        through TSQR block_rows at a time, so a tall (memory-mapped) system
+        needs O(n^2) memory
+        '''
+        if block_rows is None:
+            solution = least_squares(self.augmented_matrix(copy=False), eps=eps)
+        else:
+            matrix = self.augmented_matrix(copy=False)
+            blocks = (matrix[i:i + block_rows] for i in range(0, matrix.shape[0], block_rows))
+            solution = tsqr_least_squares(blocks, self.dimension, eps=eps)
+        basepoint, direction_vectors, residual_norm, rank = solution
+        return LeastSquaresResult(self.solution_from_arrays(basepoint, direction_vectors), residual_norm, rank)
+
+    def AdaptiveSolution(self, digits=8, max_digits=100, esp=1e-10):
+        '''solve in the cheapest precision that keeps digits correct significant digits, return an AdaptiveResult
+
+        the condition number of the equilibrated system is estimated and
+        log10 of it is the number of digits rounding may lose. float64 is used
+        when enough digits are left, otherwise elimination on Decimals with
+        just enough digits in a local context, and exact arithmetic when more
+        than max_digits are needed or the system is not square and nonsingular.
+        float inputs are rounded, so an overdetermined system can be exactly
+        inconsistent only by rounding: when exact arithmetic finds no solutions
+        the solution of the pivot rows is kept if its residual is at most esp
+        relative to |A| |x| + |b|
+        '''
+        matrix, column_scales = equilibrate(self.augmented_matrix(copy=False))
+        condition = condition_estimate(matrix[:, :-1])
+        needed = required_digits(condition, digits)
+        if needed <= FLOAT64_DIGITS:
+            pivots = eliminate_in_place(matrix, reduced=True, eps=min(esp, 0.1 / condition))
+            basepoint, direction_vectors = rref_solution(matrix, pivots, eps=np.inf)
+            return AdaptiveResult(self.solution_from_arrays(basepoint * column_scales, direction_vectors),
+                                  FLOAT64_PRECISION, FLOAT64_DIGITS, condition)
+        if needed <= max_digits:
+            # the system is square and nonsingular, so every pivot is nonzero and no tolerance is needed
+            precision = needed + 5
+            with localcontext() as context:
+                context.prec = precision
+                rows = np.array([[fraction_to_decimal(x) for x in row] for row in self.exact_rows()], dtype=object)
+                pivots = eliminate_in_place(rows, reduced=True, eps=0)
+                basepoint, direction_vectors = rref_solution(rows, pivots, eps=np.inf)
+                solution = self.solution_from_fractions([Fraction(x) for x in basepoint], [])
+            return AdaptiveResult(solution, DECIMAL_PRECISION, precision, condition)
+        rref, pivots = self.compute_rref_exact()
+        solution = exact_solution(rref, pivots)
+        if solution is None:
+            solution = exact_solution(rref, pivots, check=False)
+            matrix = self.augmented_matrix(copy=False)
+            x = np.array([float(c) for c in solution[0]])
+            residual = np.abs(matrix[:, :-1] @ x - matrix[:, -1]).max()
+            scale = np.abs(matrix[:, :-1]).sum(axis=1).max() * np.abs(x).max(initial=0) + np.abs(matrix[:, -1]).max()
+            if residual > esp * scale:
+                return AdaptiveResult(self.NO_SOLUTIONS_MSG, EXACT_PRECISION, None, condition)
+        return AdaptiveResult(self.solution_from_fractions(*solution), EXACT_PRECISION, None, condition)
+
+    def GaussianEliminationSolution(self, esp=1e-10, method=DECIMAL_METHOD, workers=1, dedupe=False, cache=None):
+        if cache is not None:
+            # the worker count never changes the result, so it is left out of the key
+            key = self.fingerprint(method, esp, dedupe)
+            solution = cache.get(key)
+            if solution is None:
+                solution = self.GaussianEliminationSolution(esp=esp, method=method, workers=workers, dedupe=dedupe)
+                cache.put(key, solution)
+            elif isinstance(solution, Parameterization):
+                self.INF_SOLUTIONS = True
+            return solution
+        if dedupe:
+            return self.deduplicated().GaussianEliminationSolution(esp=esp, method=method, workers=workers)
+        if method == self.PIVOTING_METHOD or (method == self.DECIMAL_METHOD and self._planes is None):
+            # tridiagonal, banded and block systems skip the O(n^3) dense elimination
+            if self.is_structured():
+                method = self.STRUCTURED_METHOD
+        if method == self.PIVOTING_METHOD:
+            rref, pivots = self.compute_rref_matrix(eps=esp)
+            with phase(BACK_SUBSTITUTION):
+                solution = rref_solution(rref, pivots)
+            if solution is None:
+                return self.NO_SOLUTIONS_MSG
+            return self.solution_from_arrays(*solution)
+        elif method == self.SPARSE_METHOD:
+            eliminated = self.compute_sparse_elimination(eps=esp)
+            with phase(BACK_SUBSTITUTION):
+                solution = sparse_solution(*eliminated)
+            if solution is None:
+                return self.NO_SOLUTIONS_MSG
+            return self.solution_from_arrays(*solution)
+        elif method == self.BLOCKED_METHOD:
+            return self.factorize(eps=esp, workers=workers, block_size=64).solve(self.constant_terms())
+        elif method == self.STRUCTURED_METHOD:
+            coefficients = self.coefficients()
+            with phase(TRIANGULARIZATION):
+                solution = structured_solve(coefficients, self.constant_terms(), eps=esp, workers=workers,
+                                            structure=self.structure())
+            if solution is None:
+                return self.NO_SOLUTIONS_MSG
+            return self.solution_from_arrays(*solution)
+        elif method == self.EXACT_METHOD:
+            rref = self.compute_rref_exact()
+            with phase(BACK_SUBSTITUTION):
+                solution = exact_solution(*rref)
+            if solution is None:
+                return self.NO_SOLUTIONS_MSG
+            return self.solution_from_fractions(*solution)
+        elif method != self.DECIMAL_METHOD:
+            raise Exception(self.UNKNOWN_METHOD_MSG)
+
         solution = self.compute_rref()
         indices = solution.indices_of_first_nonzero_terms_in_each_row()
         pivot_variable_num = sum([1 if i >= 0 else 0 for i in indices])
@@ -139,8 +598,9 @@ class LinearSystem(object):
             if pivot_variable_num < row.dimension:
                 print(self.INF_SOLUTIONS_MSG)
                 self.INF_SOLUTIONS = True
-                para = self.InfiniteSolutionParamterization(
-                    solution, row.dimension, pivot_variable_num, indices)
+                with phase(PARAMETERIZATION):
+                    para = self.InfiniteSolutionParamterization(
+                        solution, row.dimension, pivot_variable_num, indices)
                 return para
         # print(solution)
         return solution
@@ -149,25 +609,270 @@ class LinearSystem(object):
         if not self.INF_SOLUTIONS:
             raise Exception('Not infinite solutions problem!')
         else:
+            pivot_rows = dict((coe, index) for index, coe in enumerate(indices) if coe >= 0)
             basepoint = [0] * dimension
-            for index, coe in enumerate(indices):
+            for coe, index in pivot_rows.items():
                 basepoint[coe] = rref.planes[index].constant_term
             direction_vector_list = list()
             for i in range(dimension):
-                try:
-                    indices.index(i)
-                except Exception as e:
-                    if str(e) == '{} is not in list'.format(i):
-                        dir_vec = [0] * dimension
-                        for row in range(min(len(indices), dimension)):
-                            dir_vec[row] = - \
-                                rref.planes[row].normal_vector.coordinates[i]
-                        dir_vec[i] = 1
-                        direction_vector_list.append(Vector(dir_vec))
+                if i in pivot_rows:
+                    continue
+                dir_vec = [0] * dimension
+                for coe, index in pivot_rows.items():
+                    dir_vec[coe] = -rref.planes[index].normal_vector.coordinates[i]
+                dir_vec[i] = 1
+                direction_vector_list.append(Vector(dir_vec))
             para = Parameterization(Vector(basepoint), direction_vector_list)
             return para
 
 
+class LUFactorization(object):
+
+    RHS_LENGTH_MUST_MATCH_MSG = 'The constant terms should have one entry per equation'
+    EQUATION_LENGTH_MUST_MATCH_MSG = 'The new equation should have one coefficient per variable'
+
+    def __init__(self, system, eps=1e-10, workers=1, block_size=None, growth_limit=1e8, check_tolerance=1e-8,
+                 factors=None):
+        '''factors can pass in (lower, upper, permutation, pivots) computed before, to skip factoring'''
+        self.system = system
+        self.eps = eps
+        self.workers = workers
+        self.block_size = block_size
+        self.growth_limit = growth_limit
+        self.check_tolerance = check_tolerance
+        self.refactor_count = 0
+        self.coefficients = np.array(system.augmented_matrix(copy=False)[:, :-1])
+        self._probe = np.random.default_rng(0).standard_normal(system.dimension)
+        if factors is None:
+            self.factor()
+        else:
+            self.lower, self.upper, self.permutation, self.pivots = factors
+            self.transform = None
+            self._direction_vectors = None
+
+    def factor(self):
+        '''factor the current coefficient matrix from scratch'''
+        with phase(TRIANGULARIZATION):
+            self._factor()
+        # once updated, the factorization is kept as transform @ A = upper with transform = L^-1 P
+        self.transform = None
+        self._direction_vectors = None
+
+    def _factor(self):
+        if self.workers > 1 or self.block_size is not None:
+            self.lower, self.upper, self.permutation, self.pivots = blocked_lu_factor(
+                self.coefficients, eps=self.eps, block_size=self.block_size or 64, workers=self.workers)
+        else:
+            self.lower, self.upper, self.permutation, self.pivots = lu_factor(
+                self.coefficients, eps=self.eps)
+
+    @property
+    def rank(self):
+        return len(self.pivots)
+
+    @property
+    def direction_vectors(self):
+        if self._direction_vectors is None:
+            self._direction_vectors = lu_nullspace(self.upper, self.pivots)
+        return self._direction_vectors
+
+    def __len__(self):
+        return self.upper.shape[0]
+
+    def solve(self, b):
+        '''solve the factorized system for one vector of constant terms'''
+        return self.solve_many([b])[0]
+
+    def solve_many(self, B):
+        '''solve the factorized system for every row of B, each row holding one vector of constant terms'''
+        B = np.array(B, dtype=np.float64)
+        if B.ndim != 2 or B.shape[1] != len(self):
+            raise Exception(self.RHS_LENGTH_MUST_MATCH_MSG)
+        with phase(BACK_SUBSTITUTION):
+            if self.transform is None:
+                solutions, consistent = lu_solve(
+                    self.lower, self.upper, self.permutation, self.pivots, B.T, eps=self.eps)
+            else:
+                y = self.transform @ B.T
+                consistent = np.all(np.abs(y[self.rank:]) <= self.eps * np.abs(B.T).max(axis=0), axis=0)
+                solutions = back_substitute(self.upper, self.pivots, y)
+        return [self.system.solution_from_arrays(x, self.direction_vectors) if ok
+                else self.system.NO_SOLUTIONS_MSG
+                for x, ok in zip(solutions.T, consistent)]
+
+    def _ensure_transform(self):
+        if self.transform is None:
+            self.transform = np.linalg.solve(self.lower, np.eye(len(self))[self.permutation])
+            self.lower = self.permutation = None
+
+    def _refactor(self):
+        self.refactor_count += 1
+        self.factor()
+
+    def _check_stability(self):
+        '''refactor from scratch if transform @ A no longer matches upper on a probe vector'''
+        expected = self.coefficients @ self._probe
+        difference = self.transform @ expected - self.upper @ self._probe
+        scale = np.linalg.norm(expected) + np.linalg.norm(self.upper @ self._probe) + 1
+        if not np.linalg.norm(difference) <= self.check_tolerance * scale:
+            self._refactor()
+
+    def add_equation(self, coefficients, index=None):
+        '''add an equation with the given coefficients at position index (default last) in O(n^2)
+
+        the new row is eliminated against the pivot rows, and what is left
+        becomes a new pivot row or a zero row
+        '''
+        row = np.array(coefficients, dtype=np.float64)
+        if row.shape != (self.coefficients.shape[1],):
+            raise Exception(self.EQUATION_LENGTH_MUST_MATCH_MSG)
+        num_rows = len(self)
+        if index is None:
+            index = num_rows
+        self.coefficients = np.insert(self.coefficients, index, row, axis=0)
+        self._ensure_transform()
+        self._direction_vectors = None
+
+        transform_row = np.zeros(num_rows)
+        for k, col in enumerate(self.pivots):
+            if row[col] != 0:
+                factor = row[col] / self.upper[k, col]
+                row[col:] -= factor * self.upper[k, col:]
+                row[col] = 0
+                transform_row -= factor * self.transform[k]
+        self.transform = np.insert(self.transform, index, 0, axis=1)
+        transform_row = np.insert(transform_row, index, 1)
+        if np.abs(row).max(initial=0) > self.growth_limit * max(1, np.abs(self.coefficients[index]).max()):
+            self._refactor()
+            return
+
+        leading = np.flatnonzero(np.abs(row) > column_tolerances(self.coefficients, self.eps))
+        if len(leading) == 0:
+            position = num_rows
+            row[:] = 0
+        else:
+            position = bisect_left(self.pivots, leading[0])
+            self.pivots.insert(position, int(leading[0]))
+        self.upper = np.insert(self.upper, position, row, axis=0)
+        self.transform = np.insert(self.transform, position, transform_row, axis=0)
+        self._check_stability()
+
+    def remove_equation(self, index):
+        '''remove the equation at position index in O(n^2)
+
+        the transform rows that use the equation are combined so only one of
+        them does, preferring a zero row or else the pivot row with the largest
+        pivot column so the echelon form is kept, then that row is dropped
+        '''
+        self._ensure_transform()
+        self._direction_vectors = None
+        self.coefficients = np.delete(self.coefficients, index, axis=0)
+
+        column = self.transform[:, index]
+        candidates = np.flatnonzero(column != 0)
+        zero_rows = candidates[candidates >= self.rank]
+        if len(zero_rows):
+            k = zero_rows[np.argmax(np.abs(column[zero_rows]))]
+        else:
+            k = candidates.max()
+        others = candidates[candidates != k]
+        factors = column[others] / column[k]
+        if np.abs(factors).max(initial=0) > self.growth_limit:
+            self._refactor()
+            return
+        self.transform[others] -= np.outer(factors, self.transform[k])
+        self.upper[others] -= np.outer(factors, self.upper[k])
+        self.transform = np.delete(np.delete(self.transform, k, axis=0), index, axis=1)
+        self.upper = np.delete(self.upper, k, axis=0)
+        if k < self.rank:
+            self.pivots.pop(k)
+        self._check_stability()
+
+    def update_equation(self, index, coefficients):
+        '''replace the coefficients of the equation at position index in O(n^2)'''
+        self.remove_equation(index)
+        self.add_equation(coefficients, index=index)
+
+    def rank_one_update(self, u, v):
+        '''update the coefficient matrix to A + u v^T in O(n^2)
+
+        transform @ A = upper turns into transform @ (A + u v^T) = upper + w v^T
+        with w = transform @ u. operations on adjacent rows, each pivoting on the
+        larger of the two entries, first reduce w to its first entry from the
+        bottom up, which leaves upper one subdiagonal away from echelon form
+        once w[0] v is added to its first row, and a top-down sweep of the same
+        operations restores the echelon form. the factorization is computed
+        from scratch when the element growth or the stability check fails
+        '''
+        u = np.asarray(u, dtype=np.float64)
+        v = np.asarray(v, dtype=np.float64)
+        if u.shape != (len(self),) or v.shape != (self.coefficients.shape[1],):
+            raise Exception(self.EQUATION_LENGTH_MUST_MATCH_MSG)
+        self._ensure_transform()
+        self._direction_vectors = None
+        self.coefficients = self.coefficients + np.outer(u, v)
+        num_rows = len(self)
+
+        # w rides along as the last column while it is reduced
+        work = np.hstack([self.upper, (self.transform @ u).reshape(-1, 1)])
+        for k in range(num_rows - 1, 0, -1):
+            self._eliminate_adjacent(work, k - 1, -1)
+        self.upper = work[:, :-1]
+        self.upper[0] += work[0, -1] * v
+
+        tolerances = column_tolerances(self.coefficients, self.eps)
+        for _ in range(2):
+            if self._sweep_to_echelon(tolerances):
+                break
+        else:
+            self._refactor()
+            return
+        if np.abs(self.upper).max(initial=0) > self.growth_limit * max(1, np.abs(self.coefficients).max(initial=0)):
+            self._refactor()
+            return
+        self._check_stability()
+
+    def _eliminate_adjacent(self, work, k, col):
+        '''zero work[k + 1, col] with rows k and k + 1 of work and transform, swapping them first if row k + 1 is larger there'''
+        if abs(work[k + 1, col]) > abs(work[k, col]):
+            work[[k, k + 1]] = work[[k + 1, k]]
+            self.transform[[k, k + 1]] = self.transform[[k + 1, k]]
+        if work[k + 1, col] != 0:
+            factor = work[k + 1, col] / work[k, col]
+            work[k + 1] -= factor * work[k]
+            self.transform[k + 1] -= factor * self.transform[k]
+            work[k + 1, col] = 0
+
+    def _sweep_to_echelon(self, tolerances):
+        '''bring upper to echelon form with one top-down sweep over adjacent rows, return True when it succeeded'''
+        num_rows, num_variables = self.upper.shape
+
+        def leading(k):
+            # entries at most their column tolerance before the leading one are rounding error
+            significant = np.flatnonzero(np.abs(self.upper[k]) > tolerances)
+            lead = significant[0] if len(significant) else num_variables
+            self.upper[k, :lead] = 0
+            return lead
+
+        lead = leading(0)
+        for k in range(num_rows - 1):
+            below = leading(k + 1)
+            if below < lead:
+                self.upper[[k, k + 1]] = self.upper[[k + 1, k]]
+                self.transform[[k, k + 1]] = self.transform[[k + 1, k]]
+                below = lead
+            elif below == lead < num_variables:
+                self._eliminate_adjacent(self.upper, k, lead)
+                below = leading(k + 1)
+            lead = below
+
+        leads = [leading(k) for k in range(num_rows)]
+        pivots = [lead for lead in leads if lead < num_variables]
+        if leads[:len(pivots)] != pivots or any(a >= b for a, b in zip(pivots, pivots[1:])):
+            return False
+        self.pivots = pivots
+        return True
+
 class MyDecimal(Decimal):
 
     def is_near_zero(self, eps=1e-10):
@@ -241,3 +946,56 @@ if __name__ == '__main__':
     r = s.GaussianEliminationSolution()
     print('Five Degree:')
     print(r)
+    r = s.LeastSquaresSolution()
+    print('Five Degree Least Squares, {}:'.format(r))
+    print(r.solution)
+
+    s = LinearSystem.from_augmented_matrix([[1, 1, 1, 6], [0, 2, 5, -4], [2, 5, -1, 27]])
+    r = s.GaussianEliminationSolution(method=LinearSystem.PIVOTING_METHOD)
+    print('Partial Pivoting:')
+    print(r)
+
+    lu = s.factorize()
+    print('LU Solve Many:')
+    for r in lu.solve_many([[6, -4, 27], [1, 0, 2]]):
+        print(r)
+
+    lu.remove_equation(2)
+    lu.add_equation([0, 0, 1])
+    print('LU After Replacing An Equation:')
+    print(lu.solve([6, -4, 5]))
+
+    m = SparseMatrix.from_coo([0, 0, 1, 1, 2, 2], [0, 1, 0, 1, 1, 2], [4, 1, 1, 4, 1, 4], (3, 3))
+    s = LinearSystem.from_sparse(m, [5, 5, 5])
+    r = s.GaussianEliminationSolution(method=LinearSystem.SPARSE_METHOD)
+    print('Sparse Elimination:')
+    print(r)
+
+    m = SparseMatrix.from_coo([0, 0, 1, 1, 1, 2, 2, 3, 3, 4], [0, 1, 0, 1, 2, 1, 2, 3, 4, 4],
+                              [4, 1, 1, 4, 1, 1, 4, 2, 1, 2], (5, 5))
+    s = LinearSystem.from_sparse(m, [5, 6, 5, 3, 2])
+    r = s.GaussianEliminationSolution(method=LinearSystem.STRUCTURED_METHOD)
+    print('Structured Elimination, {}:'.format(s.structure()))
+    print(r)
+
+    s = LinearSystem([Hyperplane(normal_vector=Vector(['1', '2', '3']), constant_term='6'),
+                      Hyperplane(normal_vector=Vector(['2', '4', '7']), constant_term='13')])
+    r = s.GaussianEliminationSolution(method=LinearSystem.EXACT_METHOD)
+    print('Exact Bareiss Elimination, rank {}:'.format(s.rank_exact()))
+    print(r)
+
+    s = LinearSystem.from_augmented_matrix([[4, 1, 0, 5], [1, 4, 1, 6], [0, 1, 4, 5]])
+    for solver in ['jacobi', 'gauss_seidel', 'cg', 'gmres']:
+        r = s.IterativeSolution(solver=solver)
+        print('{}: {} {}'.format(solver, r, r.solution))
+
+    s = LinearSystem([Hyperplane(normal_vector=Vector(['1', '1', '1']), constant_term='6'),
+                      Hyperplane(normal_vector=Vector(['0', '2', '5']), constant_term='-4'),
+                      Hyperplane(normal_vector=Vector(['2', '5', '-1']), constant_term='27')])
+    with profile() as stats:
+        s.GaussianEliminationSolution()
+    print(stats)
+
+    s = LinearSystem.from_augmented_matrix([[1 / (i + j + 1) for j in range(10)] + [1] for i in range(10)])
+    r = s.AdaptiveSolution(digits=8)
+    print(r)
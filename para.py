@@ -1,18 +1,36 @@
-from vector import Vector
+from vector import Vector, FLOAT64_BACKEND
 from decimal import Decimal, getcontext
 
+import numpy as np
+
 getcontext().prec = 30
 
 
 class Parameterization(object):
+
+    __slots__ = ('basepoint', '_direction_vectors', '_direction_matrix', '_svd', 'dimension')
+
     BASEPT_AND_DIR_VECTORS_MUST_BE_IN_THE_SAME_DIM_MSG = (
         'The basepoint and direction vectors should all live in the same dimensions!')
+    PARAMETERS_MUST_MATCH_MSG = 'There should be one parameter value per direction vector'
+    POINTS_MUST_MATCH_MSG = 'The points should live in the dimension of the parameterization'
 
     def __init__(self, basepoint, direction_vectors):
+        '''direction_vectors is a list of Vector or one (k x dimension) array holding a direction per row'''
         self.basepoint = basepoint
-        self.direction_vectors = direction_vectors
         self.dimension = self.basepoint.dimension
+        self._direction_vectors = None
+        self._direction_matrix = None
+        self._svd = None
+
+        if isinstance(direction_vectors, np.ndarray):
+            if direction_vectors.ndim != 2 or direction_vectors.shape[1] != self.dimension:
+                raise Exception(
+                    self.BASEPT_AND_DIR_VECTORS_MUST_BE_IN_THE_SAME_DIM_MSG)
+            self._direction_matrix = direction_vectors
+            return
 
+        self._direction_vectors = direction_vectors
         try:
             for v in direction_vectors:
                 assert v.dimension == self.dimension
@@ -20,6 +38,83 @@ class Parameterization(object):
             raise Exception(
                 self.BASEPT_AND_DIR_VECTORS_MUST_BE_IN_THE_SAME_DIM_MSG)
 
+    @property
+    def direction_vectors(self):
+        '''the direction vectors as a list of Vector, built on first access when they are held as an array'''
+        if self._direction_vectors is None:
+            self._direction_vectors = [Vector(d, backend=FLOAT64_BACKEND) for d in self._direction_matrix]
+        return self._direction_vectors
+
+    @property
+    def direction_matrix(self):
+        '''the direction vectors as one (k x dimension) float64 array'''
+        if self._direction_matrix is None:
+            self._direction_matrix = np.array(
+                [[float(x) for x in v.coordinates] for v in self._direction_vectors],
+                dtype=np.float64).reshape(-1, self.dimension)
+        return self._direction_matrix
+
+    def basepoint_array(self):
+        '''the basepoint as a float64 array'''
+        return np.array([float(x) for x in self.basepoint.coordinates], dtype=np.float64)
+
+    def evaluate(self, T):
+        '''map an (N x k) array of parameter values to the N points basepoint + T @ directions'''
+        T = np.asarray(T, dtype=np.float64)
+        directions = self.direction_matrix
+        if T.ndim != 2 or T.shape[1] != directions.shape[0]:
+            raise Exception(self.PARAMETERS_MUST_MATCH_MSG)
+        return T @ directions + self.basepoint_array()
+
+    def contains(self, points, eps=1e-10):
+        '''return the distance of every row of an (N x dimension) array of points to the affine subspace
+
+        the direction vectors may be dependent, singular values at most eps
+        relative to the largest one are dropped from the basis of their span
+        '''
+        points = np.asarray(points, dtype=np.float64)
+        if points.ndim != 2 or points.shape[1] != self.dimension:
+            raise Exception(self.POINTS_MUST_MATCH_MSG)
+        if self._svd is None:
+            # the rank cutoff depends on eps, so only the decomposition is kept between calls
+            u, singular_values, _ = np.linalg.svd(self.direction_matrix.T, full_matrices=False)
+            self._svd = (u, singular_values)
+        u, singular_values = self._svd
+        # orthonormal basis of the span of the direction vectors, one per column
+        basis = u[:, :int(np.sum(singular_values > eps * singular_values.max(initial=0)))]
+        offsets = points - self.basepoint_array()
+        return np.linalg.norm(offsets - (offsets @ basis) @ basis.T, axis=1)
+
+    def iter_grid(self, axes, chunk_size=65536):
+        '''yield (T, points) chunks covering the grid of every combination of the parameter values in axes
+
+        axes holds one 1-D array of values per direction vector. the grid is
+        walked in C order chunk_size points at a time, so it is never built
+        whole
+        '''
+        axes = [np.asarray(a, dtype=np.float64) for a in axes]
+        if len(axes) != self.direction_matrix.shape[0]:
+            raise Exception(self.PARAMETERS_MUST_MATCH_MSG)
+        if not axes:
+            # without direction vectors the grid is the basepoint alone
+            T = np.zeros((1, 0))
+            yield T, self.evaluate(T)
+            return
+        shape = tuple(len(a) for a in axes)
+        total = int(np.prod(shape))
+        for start in range(0, total, chunk_size):
+            indices = np.unravel_index(np.arange(start, min(start + chunk_size, total)), shape)
+            T = np.column_stack([a[i] for a, i in zip(axes, indices)]).reshape(-1, len(axes))
+            yield T, self.evaluate(T)
+
+    def iter_random(self, count, low=-1.0, high=1.0, chunk_size=65536, seed=None):
+        '''yield (T, points) chunks of count points with parameter values drawn uniformly from [low, high)'''
+        rng = np.random.default_rng(seed)
+        k = self.direction_matrix.shape[0]
+        for start in range(0, count, chunk_size):
+            T = rng.uniform(low, high, (min(chunk_size, count - start), k))
+            yield T, self.evaluate(T)
+
     def __str__(self):
         def write_free_variables(index):
             output = ''
@@ -82,3 +177,9 @@ if __name__ == "__main__":
     c = Vector([0, 0, 1, 0, 0])
     v1 = Parameterization(a, [b, c])
     print(v1)
+    print(v1.evaluate([[1, 2], [0, 0]]))
+    print(v1.contains([[2, 1, 5, 7, 0], [2, 1, 0, 0, 1]]))
+    for T, points in v1.iter_grid([[0, 1], [0, 1, 2]], chunk_size=4):
+        print(len(T), points[-1])
+    v2 = Parameterization(a, [b, b * 2])
+    print(v2.contains([[2, 1, 0, 7, 0], [2, 1, 1, 0, 0]]))
@@ -1,11 +1,15 @@
 from decimal import Decimal, getcontext
 
 from vector import Vector
+from hyperplane import LazyBasepoint, canonical_rows
+from profiling import count
 
 getcontext().prec = 30
 
 
-class Plane(object):
+class Plane(LazyBasepoint):
+
+    __slots__ = ('dimension',)
 
     NO_NONZERO_ELTS_FOUND_MSG = 'No nonzero elements found'
 
@@ -23,7 +27,9 @@ class Plane(object):
 
         self.set_basepoint()
 
-    def set_basepoint(self):
+    def compute_basepoint(self):
+        '''compute a point lying on the plane'''
+        count('basepoint_computations')
         try:
             n = self.normal_vector.coordinates
             c = self.constant_term
@@ -33,11 +39,11 @@ class Plane(object):
             initial_coefficient = n[initial_index]
 
             basepoint_coords[initial_index] = Decimal(c) / initial_coefficient
-            self.basepoint = Vector(basepoint_coords)
+            return Vector(basepoint_coords)
 
         except Exception as e:
             if str(e) == self.NO_NONZERO_ELTS_FOUND_MSG:
-                self.basepoint = None
+                return None
             else:
                 raise e
 
@@ -105,6 +111,15 @@ class Plane(object):
             base_vector = self.basepoint - p.basepoint
             return base_vector.is_orthogonal_to(self.normal_vector)
 
+    def canonical_form(self, quantum=1e-9):
+        '''return the unit normal and constant term, signed and quantized to quantum, as a tuple of ints
+
+        it is a key for dedupe, not a hash: __eq__ compares with the angle
+        tolerance of is_parallel_to, so equal objects may quantize apart
+        '''
+        coefficients = [[float(c) for c in self.normal_vector.coordinates]]
+        return tuple(canonical_rows(coefficients, [float(self.constant_term)], quantum)[0].tolist())
+
 
 class MyDecimal(Decimal):
 
@@ -0,0 +1,222 @@
+import heapq
+from itertools import product
+
+import numpy as np
+
+
+class _BallNode(object):
+
+    __slots__ = ('ids', 'center', 'radius', 'offset_min', 'offset_max', 'left', 'right')
+
+    def __init__(self, ids, normals, offsets, leaf_size):
+        '''ball around the unit normals of ids, with the range of their offsets'''
+        self.center = normals.mean(axis=0)
+        self.radius = np.sqrt(((normals - self.center) ** 2).sum(axis=1).max())
+        self.offset_min = offsets.min()
+        self.offset_max = offsets.max()
+        self.left = self.right = None
+        self.ids = ids
+        if len(ids) > leaf_size:
+            points = np.hstack([normals, offsets.reshape(-1, 1)])
+            axis = int(np.argmax(points.max(axis=0) - points.min(axis=0)))
+            order = np.argsort(points[:, axis], kind='stable')
+            half = len(ids) // 2
+            left, right = order[:half], order[half:]
+            self.left = _BallNode(ids[left], normals[left], offsets[left], leaf_size)
+            self.right = _BallNode(ids[right], normals[right], offsets[right], leaf_size)
+            self.ids = None
+
+    def lower_bound(self, point, point_norm):
+        '''lower bound of the distance from point to every hyperplane in the ball'''
+        projection = self.center @ point
+        gap = max(self.offset_min - projection, projection - self.offset_max, 0)
+        return max(gap - self.radius * point_norm, 0)
+
+
+class HyperplaneIndex(object):
+
+    ZERO_NORMAL_VECTOR_MSG = 'Hyperplanes with a zero normal vector cannot be indexed'
+    DIMENSION_MUST_MATCH_MSG = 'All hyperplanes in the index should live in the same dimension'
+
+    def __init__(self, dimension, resolution=1e-6, tolerance=1e-9, leaf_size=16, rebuild_fraction=0.25):
+        '''index hyperplanes by direction bucket and by a ball tree over unit normals and offsets
+
+        every hyperplane is stored as a unit normal u and offset c with u . x = c,
+        signed so that the first coordinate of u above tolerance is positive.
+        two hyperplanes are parallel when their unit normals agree to tolerance
+        in every coordinate, up to sign. directions are bucketed after rounding
+        u to resolution, and a query probes the neighbouring bucket of every
+        coordinate within tolerance of a rounding boundary, in both signs, so
+        parallel and equal hyperplanes are found without a scan. inserts and
+        removals are applied to the ball tree lazily, it is rebuilt once the
+        pending changes exceed rebuild_fraction of its size
+        '''
+        self.dimension = dimension
+        self.resolution = resolution
+        self.tolerance = tolerance
+        self.leaf_size = leaf_size
+        self.rebuild_fraction = rebuild_fraction
+        self.hyperplanes = dict()
+        self.normals = dict()
+        self.offsets = dict()
+        self.buckets = dict()
+        self.next_id = 0
+        self.tree = None
+        self.tree_size = 0
+        self.pending = set()
+        self.removed = set()
+
+    def __len__(self):
+        return len(self.hyperplanes)
+
+    def __contains__(self, hyperplane_id):
+        return hyperplane_id in self.hyperplanes
+
+    def __getitem__(self, hyperplane_id):
+        return self.hyperplanes[hyperplane_id]
+
+    def _canonical(self, hyperplane):
+        if hyperplane.dimension != self.dimension:
+            raise Exception(self.DIMENSION_MUST_MATCH_MSG)
+        normal = np.array([float(c) for c in hyperplane.normal_vector.coordinates])
+        magnitude = np.linalg.norm(normal)
+        if magnitude == 0:
+            raise Exception(self.ZERO_NORMAL_VECTOR_MSG)
+        normal /= magnitude
+        offset = float(hyperplane.constant_term) / magnitude
+        significant = np.flatnonzero(np.abs(normal) > self.tolerance)
+        if normal[significant[0] if len(significant) else np.argmax(np.abs(normal))] < 0:
+            normal, offset = -normal, -offset
+        return normal, offset
+
+    def _bucket_key(self, normal):
+        return tuple(np.round(normal / self.resolution).astype(np.int64).tolist())
+
+    def _probe_keys(self, normal):
+        '''return the keys of every bucket that can hold a unit normal within tolerance of normal or -normal'''
+        keys = set()
+        for signed in (normal, -normal):
+            low = np.round((signed - self.tolerance) / self.resolution).astype(np.int64).tolist()
+            high = np.round((signed + self.tolerance) / self.resolution).astype(np.int64).tolist()
+            keys.update(product(*[(l,) if l == h else (l, h) for l, h in zip(low, high)]))
+        return keys
+
+    def _parallel(self, normal):
+        '''return {id: sign} of the indexed hyperplanes whose unit normal is within tolerance of sign * normal'''
+        found = dict()
+        for key in self._probe_keys(normal):
+            for i in self.buckets.get(key, ()):
+                for sign in (1, -1):
+                    if np.abs(self.normals[i] - sign * normal).max() <= self.tolerance:
+                        found[i] = sign
+                        break
+        return found
+
+    def insert(self, hyperplane):
+        '''add a hyperplane to the index and return its id'''
+        normal, offset = self._canonical(hyperplane)
+        hyperplane_id = self.next_id
+        self.next_id += 1
+        self.hyperplanes[hyperplane_id] = hyperplane
+        self.normals[hyperplane_id] = normal
+        self.offsets[hyperplane_id] = offset
+        self.buckets.setdefault(self._bucket_key(normal), set()).add(hyperplane_id)
+        self.pending.add(hyperplane_id)
+        self._maybe_rebuild()
+        return hyperplane_id
+
+    def remove(self, hyperplane_id):
+        '''remove the hyperplane with the given id from the index'''
+        del self.hyperplanes[hyperplane_id]
+        key = self._bucket_key(self.normals.pop(hyperplane_id))
+        self.offsets.pop(hyperplane_id)
+        self.buckets[key].discard(hyperplane_id)
+        if not self.buckets[key]:
+            del self.buckets[key]
+        if hyperplane_id in self.pending:
+            self.pending.discard(hyperplane_id)
+        else:
+            self.removed.add(hyperplane_id)
+        self._maybe_rebuild()
+
+    def _maybe_rebuild(self):
+        if len(self.pending) + len(self.removed) > max(self.leaf_size, self.rebuild_fraction * self.tree_size):
+            self.rebuild()
+
+    def rebuild(self):
+        '''rebuild the ball tree over every hyperplane in the index'''
+        self.pending.clear()
+        self.removed.clear()
+        self.tree_size = len(self.hyperplanes)
+        if not self.hyperplanes:
+            self.tree = None
+            return
+        ids = np.fromiter(self.hyperplanes, dtype=np.int64)
+        normals = np.array([self.normals[i] for i in ids])
+        offsets = np.array([self.offsets[i] for i in ids])
+        self.tree = _BallNode(ids, normals, offsets, self.leaf_size)
+
+    def parallel_to(self, hyperplane):
+        '''return the ids of the indexed hyperplanes parallel to hyperplane'''
+        normal, _ = self._canonical(hyperplane)
+        return sorted(self._parallel(normal))
+
+    def equal_to(self, hyperplane, tolerance=1e-10):
+        '''return the ids of the indexed hyperplanes equal to hyperplane'''
+        normal, offset = self._canonical(hyperplane)
+        return sorted(i for i, sign in self._parallel(normal).items()
+                      if abs(self.offsets[i] - sign * offset) < tolerance)
+
+    def distance(self, hyperplane_id, point):
+        '''return the distance from point to an indexed hyperplane'''
+        return abs(self.normals[hyperplane_id] @ point - self.offsets[hyperplane_id])
+
+    def _search(self, point, bound):
+        '''yield (lower bound, node) of the ball tree nodes whose lower bound may be below bound()'''
+        if self.tree is None:
+            return
+        point_norm = np.linalg.norm(point)
+        heap = [(self.tree.lower_bound(point, point_norm), 0, self.tree)]
+        counter = 1
+        while heap:
+            lower, _, node = heapq.heappop(heap)
+            if lower > bound():
+                return
+            if node.ids is not None:
+                yield node
+                continue
+            for child in (node.left, node.right):
+                heapq.heappush(heap, (child.lower_bound(point, point_norm), counter, child))
+                counter += 1
+
+    def within(self, point, radius):
+        '''return (distance, id) of every indexed hyperplane within radius of point, nearest first'''
+        point = np.asarray(point, dtype=np.float64)
+        found = [(self.distance(i, point), i) for i in self.pending]
+        for node in self._search(point, lambda: radius):
+            for i in node.ids.tolist():
+                if i not in self.removed:
+                    found.append((self.distance(i, point), i))
+        return sorted(f for f in found if f[0] <= radius)
+
+    def lying_on(self, point, tolerance=1e-10):
+        '''return the ids of the indexed hyperplanes point lies on'''
+        return [i for _, i in self.within(point, tolerance)]
+
+    def nearest(self, point, k=1):
+        '''return (distance, id) of the k indexed hyperplanes nearest to point'''
+        point = np.asarray(point, dtype=np.float64)
+        best = []
+        for i in self.pending:
+            heapq.heappush(best, (-self.distance(i, point), i))
+            if len(best) > k:
+                heapq.heappop(best)
+        worst = lambda: -best[0][0] if len(best) == k else np.inf
+        for node in self._search(point, worst):
+            for i in node.ids.tolist():
+                if i in self.removed:
+                    continue
+                heapq.heappush(best, (-self.distance(i, point), i))
+                if len(best) > k:
+                    heapq.heappop(best)
+        return sorted((-d, i) for d, i in best)
@@ -0,0 +1,75 @@
+import time
+from contextlib import contextmanager
+
+
+TRIANGULARIZATION = 'triangularization'
+BACK_SUBSTITUTION = 'back_substitution'
+PARAMETERIZATION = 'parameterization'
+COPY = 'copy'
+
+# the SolverStats collecting counts, None when profiling is off
+stats = None
+
+
+class SolverStats(object):
+
+    def __init__(self):
+        '''operation counts and seconds per phase collected while profiling'''
+        self.counts = dict()
+        self.phases = dict()
+
+    def count(self, name, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def add_time(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def as_dict(self):
+        '''return a flat dictionary of every count and of every phase time as time.<phase>'''
+        out = dict(self.counts)
+        for phase, seconds in self.phases.items():
+            out['time.' + phase] = seconds
+        return out
+
+    def __str__(self):
+        lines = ['{}: {}'.format(name, n) for name, n in sorted(self.counts.items())]
+        lines += ['{}: {:.6f}s'.format(phase, seconds) for phase, seconds in sorted(self.phases.items())]
+        return 'SolverStats:\n' + '\n'.join(lines)
+
+
+@contextmanager
+def profile():
+    '''collect solver statistics inside a with block
+
+    yield the SolverStats that receives every count and phase time until the
+    block exits. nested blocks collect into their own stats and restore the
+    outer one on exit. profiling is process global, so calls from other
+    threads are counted too
+    '''
+    global stats
+    previous = stats
+    stats = SolverStats()
+    try:
+        yield stats
+    finally:
+        stats = previous
+
+
+def count(name, n=1):
+    '''add n to the named counter when profiling is on'''
+    if stats is not None:
+        stats.count(name, n)
+
+
+@contextmanager
+def phase(name):
+    '''time the enclosed block as the named phase when profiling is on'''
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats.add_time(name, time.perf_counter() - start)
@@ -0,0 +1,212 @@
+from collections import deque
+
+import numpy as np
+
+from profiling import count
+
+
+class SparseMatrix(object):
+
+    SHAPE_MUST_MATCH_MSG = 'The entries must lie inside the shape of the matrix'
+
+    def __init__(self, shape, rows=None):
+        '''store a (m x n) matrix as one {column: value} dictionary per row'''
+        self.shape = tuple(shape)
+        if rows is None:
+            rows = [dict() for _ in range(self.shape[0])]
+        if len(rows) != self.shape[0]:
+            raise Exception(self.SHAPE_MUST_MATCH_MSG)
+        self.rows = rows
+
+    @classmethod
+    def from_dense(cls, matrix, eps=0):
+        '''build a sparse matrix from a dense 2-D array, dropping entries with absolute value <= eps'''
+        matrix = np.asarray(matrix, dtype=np.float64)
+        rows = []
+        for row in matrix:
+            columns = np.flatnonzero(np.abs(row) > eps)
+            rows.append(dict(zip(columns.tolist(), row[columns].tolist())))
+        return cls(matrix.shape, rows)
+
+    @classmethod
+    def from_coo(cls, row_indices, column_indices, values, shape):
+        '''build a sparse matrix from coordinate triplets, duplicate entries are summed'''
+        matrix = cls(shape)
+        for i, j, value in zip(row_indices, column_indices, values):
+            if not (0 <= i < matrix.shape[0] and 0 <= j < matrix.shape[1]):
+                raise Exception(cls.SHAPE_MUST_MATCH_MSG)
+            row = matrix.rows[i]
+            row[j] = row.get(j, 0.0) + float(value)
+        return matrix
+
+    @classmethod
+    def from_csr(cls, indptr, indices, data, shape):
+        '''build a sparse matrix from compressed sparse row arrays'''
+        rows = [dict(zip(indices[indptr[i]:indptr[i + 1]], map(float, data[indptr[i]:indptr[i + 1]])))
+                for i in range(shape[0])]
+        return cls(shape, rows)
+
+    def to_csr(self):
+        '''return the matrix as compressed sparse row arrays (indptr, indices, data)'''
+        indptr = np.zeros(self.shape[0] + 1, dtype=np.int64)
+        indices = np.empty(self.nnz(), dtype=np.int64)
+        data = np.empty(self.nnz(), dtype=np.float64)
+        position = 0
+        for i, row in enumerate(self.rows):
+            columns = sorted(row)
+            indices[position:position + len(columns)] = columns
+            data[position:position + len(columns)] = [row[j] for j in columns]
+            position += len(columns)
+            indptr[i + 1] = position
+        return indptr, indices, data
+
+    def to_dense(self):
+        matrix = np.zeros(self.shape)
+        for i, row in enumerate(self.rows):
+            for j, value in row.items():
+                matrix[i, j] = value
+        return matrix
+
+    def nnz(self):
+        '''return the number of stored nonzero entries'''
+        return sum(len(row) for row in self.rows)
+
+    def copy(self):
+        return self.__class__(self.shape, [dict(row) for row in self.rows])
+
+    def column_rows(self):
+        '''return, for every column, the set of rows holding a nonzero in that column'''
+        columns = [set() for _ in range(self.shape[1])]
+        for i, row in enumerate(self.rows):
+            for j in row:
+                columns[j].add(i)
+        return columns
+
+
+def reverse_cuthill_mckee(matrix):
+    '''return a reverse Cuthill-McKee ordering of the columns of a sparse matrix
+
+    two columns are neighbours when they share a row, so eliminating the
+    columns in this order keeps the fill-in close to the diagonal band
+    '''
+    num_columns = matrix.shape[1]
+    neighbours = [set() for _ in range(num_columns)]
+    for row in matrix.rows:
+        columns = list(row)
+        for j in columns:
+            neighbours[j].update(columns)
+    for j in range(num_columns):
+        neighbours[j].discard(j)
+    degrees = [len(n) for n in neighbours]
+
+    ordering = []
+    visited = [False] * num_columns
+    for start in sorted(range(num_columns), key=lambda j: degrees[j]):
+        if visited[start]:
+            continue
+        visited[start] = True
+        queue = deque([start])
+        while queue:
+            j = queue.popleft()
+            ordering.append(j)
+            for k in sorted((k for k in neighbours[j] if not visited[k]), key=lambda k: degrees[k]):
+                visited[k] = True
+                queue.append(k)
+    return ordering[::-1]
+
+
+def sparse_eliminate(matrix, constant_terms, ordering=None, eps=1e-10, pivot_threshold=0.1):
+    '''gaussian elimination on a sparse matrix, in place, eliminating the columns in the given ordering
+
+    among the rows whose entry in the pivot column is within pivot_threshold
+    of the largest one, the row with the fewest nonzeros is chosen to limit
+    fill-in. entries, pivots and the constant terms left in the non-pivot
+    rows are zero when they are at most eps relative to the largest original
+    entry of their column. return the list of (pivot row, pivot column) pairs
+    '''
+    if ordering is None:
+        ordering = reverse_cuthill_mckee(matrix)
+    rows = matrix.rows
+    tolerances = [0.0] * matrix.shape[1]
+    for row in rows:
+        for j, value in row.items():
+            tolerances[j] = max(tolerances[j], abs(value))
+    tolerances = [eps * t for t in tolerances]
+    constant_tolerance = eps * max((abs(c) for c in constant_terms), default=0.0)
+    column_rows = matrix.column_rows()
+    active = set(range(matrix.shape[0]))
+    pivots = []
+    for col in ordering:
+        count('pivot_searches')
+        candidates = [r for r in column_rows[col] if r in active]
+        if not candidates:
+            continue
+        largest = max(abs(rows[r][col]) for r in candidates)
+        if largest <= tolerances[col]:
+            continue
+        pivot_row = min((r for r in candidates if abs(rows[r][col]) >= pivot_threshold * largest),
+                        key=lambda r: len(rows[r]))
+        active.remove(pivot_row)
+        count('row_additions', len(candidates) - 1)
+        pivot = rows[pivot_row]
+        for r in candidates:
+            if r == pivot_row:
+                continue
+            row = rows[r]
+            factor = row[col] / pivot[col]
+            for j, value in pivot.items():
+                updated = row.get(j, 0.0) - factor * value
+                if j == col or abs(updated) <= tolerances[j]:
+                    if j in row:
+                        del row[j]
+                        column_rows[j].discard(r)
+                else:
+                    row[j] = updated
+                    column_rows[j].add(r)
+            constant_terms[r] -= factor * constant_terms[pivot_row]
+        pivots.append((pivot_row, col))
+    for r in active:
+        if abs(constant_terms[r]) <= constant_tolerance:
+            constant_terms[r] = 0.0
+    return pivots
+
+
+def sparse_back_substitute(matrix, constant_terms, pivots, free_values=None):
+    '''solve the pivot rows left by sparse_eliminate, free variables take free_values (default 0)'''
+    solution = dict(free_values or {})
+    for pivot_row, col in reversed(pivots):
+        row = matrix.rows[pivot_row]
+        total = constant_terms[pivot_row]
+        for j, value in row.items():
+            if j != col:
+                total -= value * solution.get(j, 0.0)
+        solution[col] = total / row[col]
+    return solution
+
+
+def sparse_solution(matrix, constant_terms, pivots, eps=0):
+    '''read the solution off an eliminated sparse system
+
+    a constant term above eps left in a non-pivot row means no solutions,
+    sparse_eliminate already zeroes the negligible ones. return (basepoint,
+    direction_vectors) like elimination.rref_solution, or None if the system
+    has no solutions
+    '''
+    pivot_rows = set(r for r, _ in pivots)
+    for r in range(matrix.shape[0]):
+        if r not in pivot_rows and abs(constant_terms[r]) > eps:
+            return None
+
+    num_variables = matrix.shape[1]
+    basepoint = np.zeros(num_variables)
+    for j, value in sparse_back_substitute(matrix, constant_terms, pivots).items():
+        basepoint[j] = value
+
+    pivot_columns = set(col for _, col in pivots)
+    free_variables = [j for j in range(num_variables) if j not in pivot_columns]
+    zeros = [0.0] * matrix.shape[0]
+    direction_vectors = np.zeros((len(free_variables), num_variables))
+    for k, free in enumerate(free_variables):
+        for j, value in sparse_back_substitute(matrix, zeros, pivots, {free: 1.0}).items():
+            direction_vectors[k, j] = value
+    return basepoint, direction_vectors
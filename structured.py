@@ -0,0 +1,284 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from sparse import SparseMatrix
+from elimination import eliminate_in_place, rref_solution
+
+
+class SystemStructure(object):
+
+    def __init__(self, shape, lower, upper, blocks, empty_rows, empty_columns):
+        '''bandwidths and independent blocks of a coefficient matrix
+
+        blocks is a list of (row indices, column indices) arrays of the
+        connected components of the rows and columns linked by nonzeros,
+        empty_rows and empty_columns hold the rows and columns without any
+        '''
+        self.shape = shape
+        self.lower = lower
+        self.upper = upper
+        self.blocks = blocks
+        self.empty_rows = empty_rows
+        self.empty_columns = empty_columns
+
+    def is_square(self):
+        return self.shape[0] == self.shape[1]
+
+    def is_tridiagonal(self):
+        return self.is_square() and self.lower <= 1 and self.upper <= 1
+
+    def is_banded(self, ratio=0.25):
+        '''judge the band holds a small fraction of the matrix or not'''
+        return self.is_square() and self.lower + self.upper + 1 <= ratio * self.shape[0]
+
+    def __str__(self):
+        return 'Structure of a {} x {} matrix: bandwidths ({}, {}), {} independent blocks'.format(
+            self.shape[0], self.shape[1], self.lower, self.upper, len(self.blocks))
+
+
+def coo_entries(coefficients):
+    '''return (row indices, column indices, values) of the nonzeros of a dense array or SparseMatrix'''
+    if isinstance(coefficients, SparseMatrix):
+        nnz = coefficients.nnz()
+        rows = np.empty(nnz, dtype=np.int64)
+        columns = np.empty(nnz, dtype=np.int64)
+        values = np.empty(nnz)
+        k = 0
+        for i, row in enumerate(coefficients.rows):
+            if row:
+                rows[k:k + len(row)] = i
+                columns[k:k + len(row)] = tuple(row)
+                values[k:k + len(row)] = tuple(row.values())
+                k += len(row)
+        keep = values != 0
+        return rows[keep], columns[keep], values[keep]
+    coefficients = np.asarray(coefficients, dtype=np.float64)
+    rows, columns = np.nonzero(coefficients)
+    return rows, columns, coefficients[rows, columns]
+
+
+def bandwidths(rows, columns):
+    '''return the (lower, upper) bandwidths of the nonzeros at rows, columns'''
+    if len(rows) == 0:
+        return 0, 0
+    offsets = columns - rows
+    return int(max(-offsets.min(), 0)), int(max(offsets.max(), 0))
+
+
+def independent_blocks(shape, rows, columns):
+    '''split the rows and columns into independent blocks linked by nonzeros
+
+    return (blocks, empty rows, empty columns) like SystemStructure
+    '''
+    parent = list(range(shape[1]))
+
+    def find(j):
+        while parent[j] != j:
+            parent[j] = parent[parent[j]]
+            j = parent[j]
+        return j
+
+    first = [-1] * shape[0]
+    for i, j in zip(rows.tolist(), columns.tolist()):
+        if first[i] < 0:
+            first[i] = j
+        else:
+            a, b = find(first[i]), find(j)
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+    roots = np.array([find(j) for j in range(shape[1])], dtype=np.int64)
+    first = np.array(first, dtype=np.int64)
+    used = np.zeros(shape[1], dtype=bool)
+    used[columns] = True
+    row_roots = np.where(first >= 0, roots[np.maximum(first, 0)], -1)
+
+    blocks = []
+    for root in np.unique(roots[used]):
+        blocks.append((np.flatnonzero(row_roots == root), np.flatnonzero(used & (roots == root))))
+    return blocks, np.flatnonzero(first < 0), np.flatnonzero(~used)
+
+
+def detect_structure(coefficients, entries=None):
+    '''detect the bandwidths and independent blocks of a dense array or SparseMatrix
+
+    entries can pass in the coo_entries of coefficients when they are at hand
+    '''
+    rows, columns, _ = coo_entries(coefficients) if entries is None else entries
+    lower, upper = bandwidths(rows, columns)
+    blocks, empty_rows, empty_columns = independent_blocks(coefficients.shape, rows, columns)
+    return SystemStructure(tuple(coefficients.shape), lower, upper, blocks, empty_rows, empty_columns)
+
+
+def band_storage(n, lower, upper, rows, columns, values):
+    '''store a square banded matrix as an (n x (2 lower + upper + 1)) array
+
+    entry (i, j) is band[i, j - i + lower], the extra lower columns on the
+    right leave room for the fill-in of partial pivoting
+    '''
+    band = np.zeros((n, 2 * lower + upper + 1))
+    band[rows, columns - rows + lower] = values
+    return band
+
+
+def thomas_solve(band, rhs, tolerances):
+    '''solve a tridiagonal system held in band storage with the Thomas algorithm
+
+    no pivoting is done, so it is only used on diagonally dominant systems.
+    return the solution, or None when the pivot of some column k is at most
+    tolerances[k]
+    '''
+    n = len(rhs)
+    sub, diagonal, sup = band[:, 0], band[:, 1], band[:, 2]
+    c = np.zeros(n)
+    d = np.zeros(n)
+    for i in range(n):
+        pivot = diagonal[i] - (sub[i] * c[i - 1] if i else 0.0)
+        if abs(pivot) <= tolerances[i]:
+            return None
+        c[i] = sup[i] / pivot
+        d[i] = (rhs[i] - (sub[i] * d[i - 1] if i else 0.0)) / pivot
+    x = np.zeros(n)
+    x[-1] = d[-1]
+    for i in range(n - 2, -1, -1):
+        x[i] = d[i] - c[i] * x[i + 1]
+    return x
+
+
+def banded_solve(band, lower, upper, rhs, tolerances):
+    '''solve a square banded system held in band storage by LU with partial pivoting, in place
+
+    every step touches at most lower + 1 rows and lower + upper + 1 columns,
+    so the cost is O(n lower (lower + upper)). return the solution, or None
+    when the pivot of some column k is at most tolerances[k]
+    '''
+    n = len(rhs)
+    rhs = np.array(rhs, dtype=np.float64)
+    for k in range(n):
+        last = min(k + lower, n - 1)
+        right = min(k + lower + upper, n - 1)
+        candidates = np.arange(k, last + 1)
+        p = k + int(np.argmax(np.abs(band[candidates, k - candidates + lower])))
+        if abs(band[p, k - p + lower]) <= tolerances[k]:
+            return None
+        width = right - k + 1
+        if p != k:
+            offset = k - p + lower
+            segment = band[p, offset:offset + width].copy()
+            band[p, offset:offset + width] = band[k, lower:lower + width]
+            band[k, lower:lower + width] = segment
+            rhs[[k, p]] = rhs[[p, k]]
+        pivot = band[k, lower:lower + width]
+        for i in range(k + 1, last + 1):
+            offset = k - i + lower
+            factor = band[i, offset] / pivot[0]
+            if factor != 0:
+                band[i, offset:offset + width] -= factor * pivot
+                rhs[i] -= factor * rhs[k]
+    x = np.zeros(n)
+    for k in range(n - 1, -1, -1):
+        m = min(lower + upper, n - 1 - k)
+        x[k] = (rhs[k] - band[k, lower + 1:lower + 1 + m] @ x[k + 1:k + 1 + m]) / band[k, lower]
+    return x
+
+
+def _is_diagonally_dominant(band):
+    return np.all(np.abs(band[:, 1]) >= np.abs(band[:, 0]) + np.abs(band[:, 2]))
+
+
+def solve_block(shape, rows, columns, values, constant_terms, eps=1e-10):
+    '''solve one block given by its nonzeros in local indices
+
+    square tridiagonal and banded blocks go through thomas_solve or
+    banded_solve, everything else, and every block they find singular,
+    through dense gauss-jordan elimination. return (basepoint,
+    direction_vectors) like elimination.rref_solution, or None
+    '''
+    num_rows, num_variables = shape
+    if num_rows == num_variables:
+        lower, upper = bandwidths(rows, columns)
+        # pivots are judged relative to their column like in eliminate_in_place
+        tolerances = np.zeros(num_variables)
+        np.maximum.at(tolerances, columns, np.abs(values))
+        tolerances *= eps
+        x = None
+        if lower <= 1 and upper <= 1 and num_rows > 1:
+            band = band_storage(num_rows, 1, 1, rows, columns, values)
+            if _is_diagonally_dominant(band):
+                x = thomas_solve(band, constant_terms, tolerances)
+        if x is None and lower + upper + 1 <= 0.25 * num_rows:
+            band = band_storage(num_rows, lower, upper, rows, columns, values)
+            x = banded_solve(band, lower, upper, constant_terms, tolerances)
+        if x is not None:
+            return x, np.zeros((0, num_variables))
+    matrix = np.zeros((num_rows, num_variables + 1))
+    matrix[rows, columns] = values
+    matrix[:, -1] = constant_terms
+    pivots = eliminate_in_place(matrix, reduced=True, eps=eps)
+    return rref_solution(matrix, pivots)
+
+
+def structured_solve(coefficients, constant_terms, eps=1e-10, workers=1, min_parallel_rows=1024, structure=None):
+    '''solve a linear system block by block, each block with the solver that fits its structure
+
+    coefficients is a dense array or SparseMatrix. with workers > 1 the
+    blocks of at least min_parallel_rows rows are solved on a process pool,
+    the kernels are python loops that hold the GIL, while the smaller ones
+    are solved in the calling process, then the solutions are put back
+    together. return (basepoint, direction_vectors) like
+    elimination.rref_solution, or None if the system has no solutions
+    '''
+    rows, columns, values = coo_entries(coefficients)
+    if structure is None:
+        structure = detect_structure(coefficients, entries=(rows, columns, values))
+    constant_terms = np.asarray(constant_terms, dtype=np.float64)
+    if np.any(np.abs(constant_terms[structure.empty_rows]) > eps * np.abs(constant_terms).max(initial=0)):
+        return None
+    num_variables = structure.shape[1]
+
+    row_block = np.full(structure.shape[0], -1)
+    local_row = np.zeros(structure.shape[0], dtype=np.int64)
+    local_column = np.zeros(num_variables, dtype=np.int64)
+    for b, (block_rows, block_columns) in enumerate(structure.blocks):
+        row_block[block_rows] = b
+        local_row[block_rows] = np.arange(len(block_rows))
+        local_column[block_columns] = np.arange(len(block_columns))
+    entry_block = row_block[rows]
+    order = np.argsort(entry_block, kind='stable')
+    starts = np.searchsorted(entry_block[order], np.arange(len(structure.blocks) + 1))
+
+    def arguments(b):
+        block_rows, block_columns = structure.blocks[b]
+        entries = order[starts[b]:starts[b + 1]]
+        return ((len(block_rows), len(block_columns)), local_row[rows[entries]],
+                local_column[columns[entries]], values[entries], constant_terms[block_rows], eps)
+
+    large = [b for b, (block_rows, _) in enumerate(structure.blocks) if len(block_rows) >= min_parallel_rows]
+    if workers > 1 and len(large) > 1:
+        solutions = [None] * len(structure.blocks)
+        with ProcessPoolExecutor(max_workers=min(workers, len(large))) as pool:
+            futures = dict((b, pool.submit(solve_block, *arguments(b))) for b in large)
+            for b in range(len(structure.blocks)):
+                if b not in futures:
+                    solutions[b] = solve_block(*arguments(b))
+            for b, future in futures.items():
+                solutions[b] = future.result()
+    else:
+        solutions = [solve_block(*arguments(b)) for b in range(len(structure.blocks))]
+    if any(solution is None for solution in solutions):
+        return None
+
+    basepoint = np.zeros(num_variables)
+    direction_vectors = []
+    for (_, block_columns), (x, directions) in zip(structure.blocks, solutions):
+        basepoint[block_columns] = x
+        embedded = np.zeros((len(directions), num_variables))
+        embedded[:, block_columns] = directions
+        direction_vectors.append(embedded)
+    free = np.zeros((len(structure.empty_columns), num_variables))
+    free[np.arange(len(structure.empty_columns)), structure.empty_columns] = 1
+    direction_vectors.append(free)
+    direction_vectors = np.vstack(direction_vectors)
+    # keep the free variables in increasing order like the other solvers
+    leading = np.argmax(np.abs(direction_vectors) > 0, axis=1) if len(direction_vectors) else []
+    return basepoint, direction_vectors[np.argsort(leading, kind='stable')]
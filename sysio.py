@@ -0,0 +1,144 @@
+import csv
+from itertools import islice
+
+import numpy as np
+
+from sparse import SparseMatrix
+
+
+MATRIX_MARKET_HEADER = '%%MatrixMarket'
+UNSUPPORTED_MATRIX_MARKET_MSG = 'Only real or integer coordinate/array Matrix Market files are supported'
+
+
+def _count_lines(path, block_size=2 ** 20):
+    lines = 0
+    last = b'\n'
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            lines += block.count(b'\n')
+            last = block[-1:]
+    return lines + (last != b'\n')
+
+
+def read_csv_matrix(path, delimiter=',', chunk_rows=65536, skip_header=False):
+    '''read a csv file of augmented rows [A | b] into a float64 array, chunk_rows rows at a time
+
+    the lines are counted first and the array is allocated once, every chunk
+    is copied into it as soon as it is parsed, so the peak memory is one
+    matrix and one chunk
+    '''
+    capacity = _count_lines(path)
+    matrix = None
+    num_rows = 0
+    with open(path, newline='') as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        if skip_header:
+            next(reader, None)
+        while True:
+            rows = [row for row in islice(reader, chunk_rows) if row]
+            if not rows:
+                break
+            if matrix is None:
+                matrix = np.empty((capacity, len(rows[0])))
+            matrix[num_rows:num_rows + len(rows)] = np.array(rows, dtype=np.float64)
+            num_rows += len(rows)
+    if matrix is None:
+        return np.zeros((0, 0))
+    # blank lines and the header were counted too, they are left unused at the end
+    return matrix[:num_rows]
+
+
+def read_npy_matrix(path, mmap=True):
+    '''read an augmented matrix [A | b] from a .npy file, memory-mapped read-only by default'''
+    return np.load(path, mmap_mode='r' if mmap else None)
+
+
+def read_matrix_market(path):
+    '''read a Matrix Market file, coordinate files become a SparseMatrix and array files a dense array'''
+    with open(path) as f:
+        header = f.readline().split()
+        if len(header) < 4 or header[0] != MATRIX_MARKET_HEADER or header[1].lower() != 'matrix':
+            raise Exception(UNSUPPORTED_MATRIX_MARKET_MSG)
+        layout, field = header[2].lower(), header[3].lower()
+        symmetry = header[4].lower() if len(header) > 4 else 'general'
+        if field not in ('real', 'integer') or symmetry not in ('general', 'symmetric'):
+            raise Exception(UNSUPPORTED_MATRIX_MARKET_MSG)
+        line = f.readline()
+        while line.startswith('%'):
+            line = f.readline()
+        size = [int(x) for x in line.split()]
+
+        if layout == 'array':
+            if symmetry == 'symmetric':
+                raise Exception(UNSUPPORTED_MATRIX_MARKET_MSG)
+            values = np.loadtxt(f, dtype=np.float64, ndmin=1)
+            return values.reshape(size[1], size[0]).T
+
+        num_rows, num_columns, _ = size
+        matrix = SparseMatrix((num_rows, num_columns))
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            i, j, value = int(parts[0]) - 1, int(parts[1]) - 1, float(parts[2])
+            matrix.rows[i][j] = matrix.rows[i].get(j, 0.0) + value
+            if symmetry == 'symmetric' and i != j:
+                matrix.rows[j][i] = matrix.rows[j].get(i, 0.0) + value
+        return matrix
+
+
+def write_matrix_market(path, matrix, comment=None):
+    '''write a SparseMatrix as a coordinate file, or a dense 2-D array as an array file'''
+    with open(path, 'w') as f:
+        if isinstance(matrix, SparseMatrix):
+            f.write('{} matrix coordinate real general\n'.format(MATRIX_MARKET_HEADER))
+            if comment:
+                f.write('% {}\n'.format(comment))
+            f.write('{} {} {}\n'.format(matrix.shape[0], matrix.shape[1], matrix.nnz()))
+            for i, row in enumerate(matrix.rows):
+                for j in sorted(row):
+                    f.write('{} {} {!r}\n'.format(i + 1, j + 1, row[j]))
+        else:
+            matrix = np.asarray(matrix, dtype=np.float64)
+            if matrix.ndim == 1:
+                matrix = matrix.reshape(-1, 1)
+            f.write('{} matrix array real general\n'.format(MATRIX_MARKET_HEADER))
+            if comment:
+                f.write('% {}\n'.format(comment))
+            f.write('{} {}\n'.format(matrix.shape[0], matrix.shape[1]))
+            for value in matrix.T.ravel():
+                f.write('{!r}\n'.format(float(value)))
+
+
+def solution_arrays(solution, dimension):
+    '''return (basepoint, direction_vectors) arrays of a solution system or Parameterization, None for no solutions'''
+    if isinstance(solution, str):
+        return None
+    if hasattr(solution, 'direction_vectors'):
+        basepoint = np.array([float(x) for x in solution.basepoint.coordinates])
+        return basepoint, solution.direction_matrix
+    basepoint = np.array(solution.augmented_matrix(copy=False)[:dimension, -1])
+    return basepoint, np.zeros((0, dimension))
+
+
+def write_solution_csv(path, solution, dimension, delimiter=','):
+    '''write a solution as csv: the first row is the basepoint, every further row a direction vector'''
+    arrays = solution_arrays(solution, dimension)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f, delimiter=delimiter)
+        if arrays is None:
+            return
+        basepoint, direction_vectors = arrays
+        writer.writerow([repr(float(x)) for x in basepoint])
+        for d in direction_vectors:
+            writer.writerow([repr(float(x)) for x in d])
+
+
+def write_solution_npy(path, solution, dimension):
+    '''write a solution as one (1 + free variables) x dimension array: basepoint, then direction vectors'''
+    arrays = solution_arrays(solution, dimension)
+    if arrays is None:
+        np.save(path, np.zeros((0, dimension)))
+        return
+    basepoint, direction_vectors = arrays
+    np.save(path, np.vstack([basepoint, direction_vectors]))
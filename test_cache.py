@@ -0,0 +1,42 @@
+import multiprocessing
+import os
+import time
+
+from cache import SolutionCache
+
+
+def read_many(path, key, n):
+    cache = SolutionCache(path, max_bytes=3500, touch_interval=0.05)
+    for _ in range(n):
+        assert cache.get(key) == b'x' * 1000
+
+
+def test_reader_process_hits_protect_entry_from_eviction(tmp_path):
+    path = os.path.join(tmp_path, 'solutions.db')
+    writer = SolutionCache(path, max_bytes=3500, touch_interval=0.05)
+    for key in ('hot', 'a', 'b'):
+        writer.put(key, b'x' * 1000)
+        time.sleep(0.1)
+
+    reader = multiprocessing.get_context('spawn').Process(target=read_many, args=(path, 'hot', 50))
+    reader.start()
+    reader.join()
+    assert reader.exitcode == 0
+
+    writer.put('c', b'x' * 1000)
+    assert 'hot' in writer
+    assert 'a' not in writer
+    assert 'b' in writer and 'c' in writer
+
+
+def test_hit_is_buffered_while_another_writer_holds_the_lock(tmp_path):
+    path = os.path.join(tmp_path, 'solutions.db')
+    cache = SolutionCache(path, touch_interval=0)
+    cache.put('key', 1)
+    with cache._transaction():
+        started = time.time()
+        assert cache.get('key') == 1
+        assert time.time() - started < 1
+    assert 'key' in cache.used
+    cache.get('key')
+    assert not cache.used
@@ -1,16 +1,160 @@
 import math
+from collections import OrderedDict
+from contextlib import contextmanager
 from decimal import Decimal, getcontext
 
+import numpy as np
+
+import profiling
+
 getcontext().prec = 30
 
+DECIMAL_BACKEND = 'decimal'
+FLOAT64_BACKEND = 'float64'
+BACKENDS = (DECIMAL_BACKEND, FLOAT64_BACKEND)
+
+UNKNOWN_BACKEND_MSG = 'The backend must be one of {}'.format(BACKENDS)
+
+default_backend = DECIMAL_BACKEND
+
+
+def set_default_backend(backend):
+    '''set the backend used by vectors created without an explicit backend'''
+    global default_backend
+    if backend not in BACKENDS:
+        raise ValueError(UNKNOWN_BACKEND_MSG)
+    default_backend = backend
+
+
+class CacheInfo(object):
+
+    def __init__(self, hits, misses, maxsize, currsize):
+        self.hits = hits
+        self.misses = misses
+        self.maxsize = maxsize
+        self.currsize = currsize
+
+    def __str__(self):
+        return 'CacheInfo(hits={}, misses={}, maxsize={}, currsize={})'.format(
+            self.hits, self.misses, self.maxsize, self.currsize)
+
+
+class PairwiseCache(object):
+
+    def __init__(self, maxsize=4096):
+        '''bounded LRU cache for results computed from a pair of vectors'''
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            value = compute()
+            self.entries[key] = value
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+            return value
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self.entries))
+
+
+lazy_mode = False
+
+
+def enable_lazy_evaluation():
+    '''make Vector arithmetic build expressions that are evaluated in one pass when first read'''
+    global lazy_mode
+    lazy_mode = True
+
+
+def disable_lazy_evaluation():
+    global lazy_mode
+    lazy_mode = False
+
+
+@contextmanager
+def lazy_evaluation():
+    '''enable lazy Vector arithmetic inside a with block'''
+    global lazy_mode
+    previous = lazy_mode
+    lazy_mode = True
+    try:
+        yield
+    finally:
+        lazy_mode = previous
+
+
+pairwise_cache = None
+
+
+def enable_pairwise_cache(maxsize=4096):
+    '''cache angle, dot_product and is_parallel_to results in a bounded LRU cache'''
+    global pairwise_cache
+    pairwise_cache = PairwiseCache(maxsize)
+
+
+def disable_pairwise_cache():
+    global pairwise_cache
+    pairwise_cache = None
+
+
+def pairwise_cache_info():
+    '''return the hit/miss statistics of the pairwise cache, or None if it is disabled'''
+    if pairwise_cache is None:
+        return None
+    return pairwise_cache.info()
+
+
+def _cached_pairwise(func):
+    '''look the result of a pairwise method up in the pairwise cache when it is enabled'''
+    def wrapper(self, v, *args, **kwargs):
+        if pairwise_cache is None:
+            return func(self, v, *args, **kwargs)
+        # vectors compare equal across backends, but the results are computed in the backend of self
+        key = (func.__name__, self, self.backend, v, v.backend, args, tuple(sorted(kwargs.items())))
+        return pairwise_cache.get_or_compute(key, lambda: func(self, v, *args, **kwargs))
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__ = func.__doc__
+    return wrapper
+
+
 class Vector(object):
 
-    def __init__(self, coordinates):
+    __slots__ = ('coordinates', 'dimension', 'backend',
+                 '_magnitude', '_unit_vector', '_direction', '_hash')
+
+    VECTOR_IS_IMMUTABLE_MSG = 'Vectors are immutable'
+
+    def __init__(self, coordinates, backend=None):
+        if backend is None:
+            backend = default_backend
+        if backend not in BACKENDS:
+            raise ValueError(UNKNOWN_BACKEND_MSG)
+        self._set('backend', backend)
+
         try:
-            if not coordinates:
+            if coordinates is None or len(coordinates) == 0:
                 raise ValueError
-            self.coordinates = tuple([Decimal(x) for x in coordinates])
-            self.dimension = len(coordinates)
+            if backend == FLOAT64_BACKEND:
+                coordinates = np.array(coordinates, dtype=np.float64)
+                coordinates.flags.writeable = False
+                self._set('coordinates', coordinates)
+            else:
+                self._set('coordinates', tuple([Decimal(x) for x in coordinates]))
+            self._set('dimension', len(coordinates))
 
         except ValueError:
             raise ValueError('The coordinates must be nonempty')
@@ -18,10 +162,74 @@ class Vector(object):
         except TypeError:
             raise TypeError('The coordinates must be an iterable')
 
+        for name in ('_magnitude', '_unit_vector', '_direction', '_hash'):
+            self._set(name, None)
+        if profiling.stats is not None:
+            profiling.stats.count('vector_allocations')
+
+    def _set(self, name, value):
+        object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(self.VECTOR_IS_IMMUTABLE_MSG)
+
+    def __delattr__(self, name):
+        raise AttributeError(self.VECTOR_IS_IMMUTABLE_MSG)
+
+    def __reduce__(self):
+        if self.is_float64():
+            return (self.__class__, (self.coordinates.tolist(), self.backend))
+        return (self.__class__, (self.coordinates, self.backend))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __hash__(self):
+        if self._hash is None:
+            if self.is_float64():
+                self._set('_hash', hash(tuple(self.coordinates.tolist())))
+            else:
+                self._set('_hash', hash(self.coordinates))
+        return self._hash
+
+    def is_float64(self):
+        '''judge the vector is stored in the float64 backend or not'''
+        return self.backend == FLOAT64_BACKEND
+
+    def to_backend(self, backend):
+        '''return a copy of self stored in the given backend'''
+        if backend == self.backend:
+            return self
+        if backend == FLOAT64_BACKEND:
+            return self.__class__(self.coordinates, backend=backend)
+        return self.__class__(self.coordinates.tolist(), backend=backend)
+
+    def _new(self, coordinates):
+        return self.__class__(coordinates, backend=self.backend)
+
+    def _scalar(self, scalar):
+        if self.is_float64():
+            return float(scalar)
+        return Decimal(scalar)
+
+    def _other_coordinates(self, v):
+        return v.to_backend(self.backend).coordinates
+
     def __str__(self):
+        if self.is_float64():
+            return 'Vector: {}'.format(tuple(self.coordinates.tolist()))
         return 'Vector: {}'.format(self.coordinates)
 
     def __eq__(self, v):
+        if not isinstance(v, Vector):
+            return False
+        if self.is_float64() and v.is_float64():
+            return bool(np.array_equal(self.coordinates, v.coordinates))
+        if self.is_float64() or v.is_float64():
+            return self.to_backend(DECIMAL_BACKEND).coordinates == v.to_backend(DECIMAL_BACKEND).coordinates
         if self and v:
             return self.coordinates == v.coordinates
         else:
@@ -30,67 +238,106 @@ class Vector(object):
     def __add__(self, v):
         ''' calculate vector a plus vector b'''
         if self.dimension == v.dimension:
-            out = [x + y for x, y in zip(self.coordinates, v.coordinates)]
-            return self.__class__(out)
+            if lazy_mode:
+                return LazyVector.from_terms(self, ((1, self), (1, v)))
+            if self.is_float64():
+                return self._new(self.coordinates + self._other_coordinates(v))
+            out = [x + y for x, y in zip(self.coordinates, self._other_coordinates(v))]
+            return self._new(out)
         else:
             print('Two vectors must have the same dimensions!')
 
     def __sub__(self, v):
         ''' calculate vector a minus vector b'''
         if self.dimension == v.dimension:
-            out = [x - y for x, y in zip(self.coordinates, v.coordinates)]
-            return self.__class__(out)
+            if lazy_mode:
+                return LazyVector.from_terms(self, ((1, self), (-1, v)))
+            if self.is_float64():
+                return self._new(self.coordinates - self._other_coordinates(v))
+            out = [x - y for x, y in zip(self.coordinates, self._other_coordinates(v))]
+            return self._new(out)
         else:
             print('Two vectors must have the same dimensions!')
 
     def __mul__(self, scalar):
         '''scalling vectors'''
-        out = [x * Decimal(scalar) for x in self.coordinates]
-        return self.__class__(out)
+        return self.times_scalar(scalar)
 
     def __rmul__(self, scalar):
         '''scalling vectors'''
-        out = [x * Decimal(scalar) for x in self.coordinates]
-        return self.__class__(out)
+        return self.times_scalar(scalar)
 
     def times_scalar(self,scalar):
         '''scalling vectors'''
+        if lazy_mode:
+            return LazyVector.from_terms(self, ((scalar, self),))
+        if self.is_float64():
+            return self._new(self.coordinates * float(scalar))
         out = [x * Decimal(scalar) for x in self.coordinates]
-        return self.__class__(out)
+        return self._new(out)
 
     def magnitude(self):
-        '''calculate the magnitude of vectors'''
-        out = Decimal(math.sqrt(sum(x**2 for x in self.coordinates)))
-        return out
+        '''calculate the magnitude of vectors, computed once per vector'''
+        if self._magnitude is None:
+            if self.is_float64():
+                self._set('_magnitude', math.sqrt(np.dot(self.coordinates, self.coordinates)))
+            else:
+                self._set('_magnitude', Decimal(math.sqrt(sum(x**2 for x in self.coordinates))))
+        return self._magnitude
 
     def __truediv__(self, scalar):
+        if lazy_mode:
+            if scalar == 0:
+                raise Exception('Cannot divided by zero!')
+            return LazyVector.from_terms(self, ((1 / self._scalar(scalar), self),))
+        if self.is_float64():
+            if scalar == 0:
+                raise Exception('Cannot divided by zero!')
+            return self._new(self.coordinates / float(scalar))
         try:
             out = [x / Decimal(scalar) for x in self.coordinates]
-            return self.__class__(out)
+            return self._new(out)
         except ZeroDivisionError:
             raise Exception('Cannot divided by zero!')
 
     def unit_vector(self):
-        '''calculate the unit vector'''
-        return self / self.magnitude()
-
+        '''calculate the unit vector, computed once per vector'''
+        if self._unit_vector is None:
+            self._set('_unit_vector', self / self.magnitude())
+        return self._unit_vector
+
+    def normalized_direction(self):
+        '''return the unit vector with its first nonzero coordinate made positive, shared by all parallel vectors'''
+        if self._direction is None:
+            unit_vector = self.unit_vector()
+            first = next(x for x in unit_vector.coordinates if x != 0)
+            self._set('_direction', unit_vector if first > 0 else unit_vector * -1)
+        return self._direction
+
+    @_cached_pairwise
     def dot_product(self, v):
         '''calculate the dot product of vector self and vector v'''
         if self.dimension == v.dimension:
-            out = sum([x * y for x, y in zip(self.coordinates, v.coordinates)])
+            if self.is_float64():
+                return float(np.dot(self.coordinates, self._other_coordinates(v)))
+            out = sum([x * y for x, y in zip(self.coordinates, self._other_coordinates(v))])
             return out
         else:
             print('Tow vectors must have the same dimensions!')
 
+    @_cached_pairwise
     def angle(self, v, mode='rad'):
         '''calculate the angle between vector self and vector v'''
         try:
-            out = Decimal(math.acos(max(min(self.dot_product(
-                v) / (self.magnitude() * v.magnitude()), 1), -1)) % (2 * math.pi))
+            magnitudes = self.magnitude() * v.magnitude()
+            if magnitudes == 0:
+                raise ZeroDivisionError
+            out = self._scalar(math.acos(max(min(self.dot_product(
+                v) / self._scalar(magnitudes), 1), -1)) % (2 * math.pi))
             if mode == 'rad':
                 return out
             else:
-                return out / Decimal(math.pi * 180)
+                return out / self._scalar(math.pi * 180)
         except ZeroDivisionError:
             raise Exception('Vectors cannot be zero!')
 
@@ -102,9 +349,10 @@ class Vector(object):
         '''judge vector self is orthogonal to vector v or not'''
         return abs(self.dot_product(v)) < tolerance
 
+    @_cached_pairwise
     def is_parallel_to(self, v, tolerance=1e-6):
         '''judge vector self is parallel to vector v or not'''
-        return self.is_zero() or v.is_zero() or abs(self.angle(v) - Decimal(math.pi)) < tolerance or abs(self.angle(v)) < tolerance
+        return self.is_zero() or v.is_zero() or abs(self.angle(v) - self._scalar(math.pi)) < tolerance or abs(self.angle(v)) < tolerance
 
     def projection_on(self, v):
         '''calculate the prejection of self onto v'''
@@ -117,10 +365,18 @@ class Vector(object):
 
     def cross_product(self, v):
         '''calculate the cross product of vector self and vector v'''
+        if self.is_float64():
+            if self.dimension not in (2, 3) or v.dimension != self.dimension:
+                raise Exception("Cross product only defined in tow three dimensions vectors!")
+            other = self._other_coordinates(v)
+            if self.dimension == 3:
+                return self._new(np.cross(self.coordinates, other))
+            # np.cross of 2-D vectors is deprecated, the product of vectors in the xy plane only has a z component
+            return self._new([0, 0, self.coordinates[0] * other[1] - other[0] * self.coordinates[1]])
         try:
             x_1, y_1, z_1 = self.coordinates
-            x_2, y_2, z_2 = v.coordinates
-            return self.__class__([y_1 * z_2 - y_2 * z_1, -(x_1 * z_2 - x_2 * z_1), x_1 * y_2 - x_2 * y_1])
+            x_2, y_2, z_2 = self._other_coordinates(v)
+            return self._new([y_1 * z_2 - y_2 * z_1, -(x_1 * z_2 - x_2 * z_1), x_1 * y_2 - x_2 * y_1])
         except ValueError as e:
             msg = str(e)
             if msg == 'need more than 2 values to unpack':
@@ -136,11 +392,258 @@ class Vector(object):
     def parallelogram_spanned_with(self, v):
         '''calculate the area of parallelogram spanned by vector self and vector v'''
         # return self.cross_product(v).magnitude()
-        return self.magnitude() * v.magnitude() * Decimal(math.sin(self.angle(v)))
+        return self.magnitude() * self._scalar(v.magnitude()) * self._scalar(math.sin(self.angle(v)))
 
     def triangle_spanned_with(self, v):
         '''calculate the area of triangle spanned by vector self and vectro v'''
-        return Decimal(0.5) * self.parallelogram_spanned_with(v)
+        return self._scalar(0.5) * self.parallelogram_spanned_with(v)
+
+
+class LazyVector(Vector):
+
+    __slots__ = ('_terms',)
+
+    def __init__(self, coordinates, backend=None):
+        self._set('_terms', None)
+        Vector.__init__(self, coordinates, backend=backend)
+
+    @classmethod
+    def from_terms(cls, like, terms):
+        '''build the unevaluated linear combination sum(c * v for c, v in terms), in the backend of like'''
+        vector = cls.__new__(cls)
+        vector._set('_terms', terms)
+        vector._set('backend', like.backend)
+        vector._set('dimension', like.dimension)
+        for name in ('_magnitude', '_unit_vector', '_direction', '_hash'):
+            vector._set(name, None)
+        return vector
+
+    @property
+    def coordinates(self):
+        if self._terms is not None:
+            self.evaluate()
+        return Vector.coordinates.__get__(self)
+
+    @coordinates.setter
+    def coordinates(self, coordinates):
+        Vector.coordinates.__set__(self, coordinates)
+
+    def is_evaluated(self):
+        return self._terms is None
+
+    def evaluate(self):
+        '''compute the coordinates of the whole expression in one pass and drop the expression
+
+        every chain of +, -, * and / is a linear combination of the vectors it
+        was built from, so the coefficient of each of them is collected over
+        the expression graph and the coordinates are summed once, without
+        intermediate vectors
+        '''
+        if self._terms is None:
+            return self
+        # post-order of the expression graph, a node is visited when it is expanded so that a shared
+        # subexpression is only appended after every node above it, and reversed order is topological
+        order = []
+        visited = set()
+        stack = [(self, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded:
+                order.append(node)
+                continue
+            if id(node) in visited:
+                continue
+            visited.add(id(node))
+            stack.append((node, True))
+            for _, child in node._terms:
+                if isinstance(child, LazyVector) and child._terms is not None and id(child) not in visited:
+                    stack.append((child, False))
+
+        one = self._scalar(1)
+        coefficients = {id(self): one}
+        leaves = dict()
+        for node in reversed(order):
+            scale = coefficients.pop(id(node))
+            for c, child in node._terms:
+                key = id(child)
+                if not (isinstance(child, LazyVector) and child._terms is not None):
+                    leaves[key] = child
+                coefficients[key] = coefficients.get(key, 0) + scale * self._scalar(c)
+
+        vectors = [leaves[key].to_backend(self.backend).coordinates for key in leaves]
+        scales = [coefficients[key] for key in leaves]
+        if self.is_float64():
+            coordinates = np.dot(np.array(scales), np.array(vectors))
+            coordinates.flags.writeable = False
+        else:
+            coordinates = tuple([sum(c * x for c, x in zip(scales, column)) for column in zip(*vectors)])
+        self._set('coordinates', coordinates)
+        self._set('_terms', None)
+        return self
+
+    def _new(self, coordinates):
+        return Vector(coordinates, backend=self.backend)
+
+    def to_backend(self, backend):
+        if backend == self.backend:
+            return self
+        return self._new(self.coordinates).to_backend(backend)
+
+    def __reduce__(self):
+        return self._new(self.coordinates).__reduce__()
+
+
+class VectorBatch(object):
+
+    BATCH_MUST_BE_TWO_DIMENSIONAL_MSG = 'The coordinates must be a nonempty (N x d) array'
+    BATCHES_MUST_BROADCAST_MSG = 'Two batches must have the same dimensions and broadcastable lengths!'
+    VECTORS_CANNOT_BE_ZERO_MSG = 'Vectors cannot be zero!'
+
+    def __init__(self, coordinates):
+        coordinates = np.array(coordinates, dtype=np.float64)
+        if coordinates.ndim == 1:
+            coordinates = coordinates.reshape(1, -1)
+        if coordinates.ndim != 2 or coordinates.shape[1] == 0:
+            raise ValueError(self.BATCH_MUST_BE_TWO_DIMENSIONAL_MSG)
+        self.coordinates = coordinates
+        self.dimension = coordinates.shape[1]
+
+    @classmethod
+    def from_vectors(cls, vectors):
+        '''stack a list of vectors into one batch'''
+        return cls([v.to_backend(FLOAT64_BACKEND).coordinates for v in vectors])
+
+    def to_vectors(self, backend=None):
+        '''split the batch into a list of vectors'''
+        if backend is None:
+            backend = default_backend
+        if backend == FLOAT64_BACKEND:
+            return [Vector(row, backend=backend) for row in self.coordinates]
+        return [Vector(row.tolist(), backend=backend) for row in self.coordinates]
+
+    def __len__(self):
+        return self.coordinates.shape[0]
+
+    def __getitem__(self, i):
+        return Vector(self.coordinates[i], backend=FLOAT64_BACKEND)
+
+    def __str__(self):
+        return 'VectorBatch: {} vectors of dimension {}'.format(len(self), self.dimension)
+
+    def _other_coordinates(self, v):
+        '''return the coordinates of a vector or batch as an array broadcastable against self'''
+        if isinstance(v, Vector):
+            other = v.to_backend(FLOAT64_BACKEND).coordinates.reshape(1, -1)
+        else:
+            other = v.coordinates
+        if other.shape[1] != self.dimension or not (
+                other.shape[0] == 1 or len(self) == 1 or other.shape[0] == len(self)):
+            raise ValueError(self.BATCHES_MUST_BROADCAST_MSG)
+        return other
+
+    def __add__(self, v):
+        '''calculate batch a plus vector or batch b row by row'''
+        return self.__class__(self.coordinates + self._other_coordinates(v))
+
+    def __sub__(self, v):
+        '''calculate batch a minus vector or batch b row by row'''
+        return self.__class__(self.coordinates - self._other_coordinates(v))
+
+    def times_scalar(self, scalar):
+        '''scalling every vector by a scalar or by one scalar per vector'''
+        scalar = np.asarray(scalar, dtype=np.float64)
+        if scalar.ndim == 1:
+            scalar = scalar.reshape(-1, 1)
+        return self.__class__(self.coordinates * scalar)
+
+    def __mul__(self, scalar):
+        '''scalling vectors'''
+        return self.times_scalar(scalar)
+
+    def __rmul__(self, scalar):
+        '''scalling vectors'''
+        return self.times_scalar(scalar)
+
+    def magnitude(self):
+        '''calculate the magnitude of every vector'''
+        return np.sqrt(np.einsum('ij,ij->i', self.coordinates, self.coordinates))
+
+    def unit_vector(self):
+        '''calculate the unit vector of every vector'''
+        magnitude = self.magnitude()
+        if np.any(magnitude == 0):
+            raise Exception('Cannot divided by zero!')
+        return self.__class__(self.coordinates / magnitude.reshape(-1, 1))
+
+    def dot_product(self, v):
+        '''calculate the dot product of every vector in self with v'''
+        other = self._other_coordinates(v)
+        if other.shape[0] == 1:
+            return self.coordinates @ other[0]
+        if len(self) == 1:
+            return other @ self.coordinates[0]
+        return np.einsum('ij,ij->i', self.coordinates, other)
+
+    def _angle(self, v):
+        magnitudes = self.magnitude() * self.__class__(self._other_coordinates(v)).magnitude()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cosine = np.clip(self.dot_product(v) / magnitudes, -1, 1)
+        return np.arccos(cosine) % (2 * math.pi), magnitudes == 0
+
+    def angle(self, v, mode='rad'):
+        '''calculate the angle between every vector in self and v'''
+        out, is_zero = self._angle(v)
+        if np.any(is_zero):
+            raise Exception(self.VECTORS_CANNOT_BE_ZERO_MSG)
+        if mode == 'rad':
+            return out
+        else:
+            return out / (math.pi * 180)
+
+    def is_zero(self, tolerance=1e-10):
+        '''judge every vector is 0 or not'''
+        return np.abs(self.magnitude()) < tolerance
+
+    def is_orthogonal_to(self, v, tolerance=1e-10):
+        '''judge every vector in self is orthogonal to v or not'''
+        return np.abs(self.dot_product(v)) < tolerance
+
+    def is_parallel_to(self, v, tolerance=1e-6):
+        '''judge every vector in self is parallel to v or not'''
+        angle, is_zero = self._angle(v)
+        other_is_zero = self.__class__(self._other_coordinates(v)).is_zero()
+        return (is_zero | self.is_zero() | other_is_zero |
+                (np.abs(angle - math.pi) < tolerance) | (np.abs(angle) < tolerance))
+
+    def projection_on(self, v):
+        '''calculate the prejection of every vector in self onto v'''
+        unit_vector = self.__class__(self._other_coordinates(v)).unit_vector()
+        return unit_vector * self.dot_product(unit_vector)
+
+    def orthogonal_on(self, v):
+        '''calculate the component of every vector in self orthogonal to v'''
+        return self - self.projection_on(v)
+
+    def cross_product(self, v):
+        '''calculate the cross product of every vector in self with v'''
+        if self.dimension not in (2, 3):
+            raise Exception("Cross product only defined in tow three dimensions vectors!")
+        other = self._other_coordinates(v)
+        if self.dimension == 3:
+            return self.__class__(np.cross(self.coordinates, other))
+        out = np.zeros((max(len(self), other.shape[0]), 3))
+        out[:, 2] = self.coordinates[:, 0] * other[:, 1] - other[:, 0] * self.coordinates[:, 1]
+        return self.__class__(out)
+
+    def parallelogram_spanned_with(self, v):
+        '''calculate the area of parallelogram spanned by every vector in self and v'''
+        other = self.__class__(self._other_coordinates(v))
+        return self.magnitude() * other.magnitude() * np.sin(self.angle(v))
+
+    def triangle_spanned_with(self, v):
+        '''calculate the area of triangle spanned by every vector in self and v'''
+        return 0.5 * self.parallelogram_spanned_with(v)
+
 
 if __name__ == '__main__':
     v1 = Vector([8.218, -9.341])
@@ -193,4 +696,27 @@ if __name__ == '__main__':
 
     v18 = Vector([1.671, -1.012, -.318])
     a = 7.41
-    print('Scalling:', a * v18)
\ No newline at end of file
+    print('Scalling:', a * v18)
+
+    v19 = Vector([1.671, -1.012, -.318], backend=FLOAT64_BACKEND)
+    v20 = Vector([-4.496, -8.755, 7.103], backend=FLOAT64_BACKEND)
+    print('Float64 Dot Product:', v19.dot_product(v20))
+    print('Float64 Cross Product:', v19.cross_product(v20))
+
+    batch = VectorBatch.from_vectors([v8, v10, v12, v16])
+    print(batch)
+    print('Batch Dot Product:', batch.dot_product(v9))
+    print('Batch Is Parallel:', batch.is_parallel_to(batch * 2))
+
+    with lazy_evaluation():
+        v21 = v14 * 2 + v15 * 3 - v14.projection_on(v15)
+        print('Lazy Expression Evaluated:', v21.is_evaluated())
+        print('Lazy Expression:', v21)
+        v22 = v14 + v15
+        v23 = v22 + v22 * 2
+        print('Lazy Shared Subexpression:', v23, '=', (v14 + v15).evaluate() * 3)
+
+    enable_pairwise_cache(maxsize=128)
+    for _ in range(3):
+        v12.is_parallel_to(v13)
+    print('Pairwise Cache:', pairwise_cache_info())